@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from queue import Empty, LifoQueue
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from config.driver import DEFAULT_RENDER_PROFILE, FULL_PROFILE, LINKS_PROFILE, get_chrome_driver
+from config.metrics import STAGE_SECONDS, timed
+
+logger = logging.getLogger(__name__)
+
+# Pool settings, overridable from the environment
+POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "4"))  # Max links-only browsers alive at once
+FULL_POOL_SIZE = int(os.getenv("FULL_DRIVER_POOL_SIZE", "1"))  # Max full-rendering browsers alive at once
+WARM_UP_SIZE = int(os.getenv("DRIVER_POOL_WARM_UP", "2"))  # Browsers started at app startup
+MAX_PAGES_PER_DRIVER = int(os.getenv("DRIVER_MAX_PAGES", "50"))  # Recycle a browser after this many pages
+CHECKOUT_TIMEOUT = 60  # Seconds to wait for a free browser
+
+
+class DriverPool:
+    """Bounded pool of reusable headless Chrome drivers.
+
+    Drivers are checked out with ``checkout()`` and returned automatically.
+    A driver is health-checked before reuse, recycled after ``max_pages``
+    page loads and discarded if the caller raises while holding it.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, max_pages: int = MAX_PAGES_PER_DRIVER, factory=get_chrome_driver):
+        self.size = size
+        self.max_pages = max_pages
+        self._factory = factory
+        self._idle: LifoQueue = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._uses: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def warm_up(self, count: int = WARM_UP_SIZE) -> int:
+        """Start up to ``count`` idle drivers ahead of the first request."""
+        started = 0
+        for _ in range(min(count, self.size) - self._idle.qsize()):
+            try:
+                self._idle.put(self._create())
+                started += 1
+            except Exception as e:
+                logger.error(f"Error warming up driver pool: {e}")
+                break
+        logger.info(f"Driver pool warmed up with {started} browser(s)")
+        return started
+
+    @contextmanager
+    def checkout(self, timeout: float = CHECKOUT_TIMEOUT):
+        """Borrow a driver for the duration of a ``with`` block."""
+        if self._closed:
+            raise RuntimeError("Driver pool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No browser available after {timeout}s")
+        driver = None
+        try:
+            driver = self._acquire()
+            yield driver
+        except Exception:
+            # The browser may be in an unknown state, never hand it out again
+            if driver is not None:
+                self._discard(driver)
+                driver = None
+            raise
+        finally:
+            if driver is not None:
+                self._release(driver)
+            self._slots.release()
+
+    def close(self):
+        """Quit every idle driver and refuse further checkouts."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except Empty:
+                break
+
+    def _acquire(self) -> webdriver.Chrome:
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except Empty:
+                return self._create()
+            if self._is_healthy(driver):
+                return driver
+            logger.warning("Discarding unhealthy browser from pool")
+            self._discard(driver)
+
+    def _release(self, driver: webdriver.Chrome):
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+        if self._closed or uses >= self.max_pages:
+            logger.info(f"Recycling browser after {uses} page(s)")
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    def _create(self) -> webdriver.Chrome:
+        driver = self._factory()
+        with self._lock:
+            self._uses[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver: webdriver.Chrome):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting browser: {e}")
+
+    @staticmethod
+    def _is_healthy(driver: webdriver.Chrome) -> bool:
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+
+# Browsers of each render profile are pooled separately, since Chrome options are fixed at launch.
+# Full-rendering browsers are only started when a request asks for one.
+driver_pools = {
+    LINKS_PROFILE: DriverPool(POOL_SIZE, factory=partial(get_chrome_driver, LINKS_PROFILE)),
+    FULL_PROFILE: DriverPool(FULL_POOL_SIZE, factory=partial(get_chrome_driver, FULL_PROFILE)),
+}
+driver_pool = driver_pools[DEFAULT_RENDER_PROFILE]
+
+# Selenium calls block, so they run here instead of on the event loop.
+# One thread per pooled browser is enough to keep every browser busy.
+browser_executor = ThreadPoolExecutor(max_workers=POOL_SIZE + FULL_POOL_SIZE, thread_name_prefix="browser")
+
+
+def close_driver_pools():
+    for pool in driver_pools.values():
+        pool.close()
+
+
+def _render_page(url: str, profile: str) -> str:
+    started = time.perf_counter()
+    with driver_pools[profile].checkout() as driver:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="driver_acquire")
+        with timed("page_load"):
+            try:
+                driver.get(url)
+            except TimeoutException:
+                # The DOM read so far is usually enough to find links, so keep it
+                logger.warning(f"Page load of {url} timed out, using the partial page")
+                driver.execute_script("window.stop();")
+            return driver.page_source
+
+
+async def render_page(url: str, profile: str = DEFAULT_RENDER_PROFILE) -> str:
+    """Load ``url`` in a pooled browser of ``profile`` off the event loop and return its HTML."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(browser_executor, _render_page, url, profile)
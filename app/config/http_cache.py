@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from config.http_client import get_session, request_limiter
+from config.metrics import CACHE_RESULTS, ERRORS, PAGES_FETCHED, RESPONSE_BYTES, STAGE_SECONDS, host_label
+from config.rate_limit import host_scheduler
+from config.resilience import CircuitOpenError, circuit_breakers
+from config.urls import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Cache settings, overridable from the environment
+CACHE_PATH = os.getenv("HTTP_CACHE_PATH", os.path.join(".cache", "http_cache.sqlite3"))
+CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CACHE_TTL = int(os.getenv("HTTP_CACHE_TTL", "3600"))  # Seconds an entry is served without revalidation
+CACHE_MAX_IDLE = 7 * 24 * 3600  # Entries unused for this long are evicted
+MAX_BODY_BYTES = int(os.getenv("HTTP_MAX_BODY_BYTES", str(5 * 1024 * 1024)))  # Longer bodies are truncated
+READ_CHUNK_SIZE = 64 * 1024
+
+CHARSET_SNIFF_BYTES = 1024  # Where HTML requires a <meta charset> to appear
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+TEXT_SUBTYPES = ("html", "xml", "json")  # Non-"text/" types that are still worth reading
+
+# Per-request cache modes
+CACHE_USE = "use"  # Serve fresh entries, revalidate stale ones
+CACHE_REFRESH = "refresh"  # Always revalidate, even when fresh
+CACHE_BYPASS = "bypass"  # Neither read nor write the cache
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body: bytes
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def is_fresh(self, ttl: int) -> bool:
+        return time.time() - self.stored_at < ttl
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status: int
+    body: bytes
+    content_type: str
+    cache_status: str  # "hit", "revalidated", "miss" or "bypass"
+    truncated: bool = False  # The body was cut at the byte limit
+    skipped: bool = False  # The body was not read because it is not text
+
+    @property
+    def is_text(self) -> bool:
+        return is_text_type(self.content_type)
+
+    @property
+    def charset(self) -> str:
+        """The charset from the Content-Type header, else from a ``<meta>`` tag, else UTF-8."""
+        for param in self.content_type.split(";")[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "charset" and value.strip():
+                return value.strip().strip('"')
+        if self.body.startswith(b"\xef\xbb\xbf"):
+            return "utf-8-sig"
+        match = META_CHARSET_PATTERN.search(self.body, 0, CHARSET_SNIFF_BYTES)
+        if match:
+            return match.group(1).decode("ascii")
+        return "utf-8"
+
+    def text(self) -> str:
+        try:
+            return self.body.decode(self.charset, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+
+class HTTPCache:
+    """Size-bounded on-disk HTTP response cache keyed by normalized URL.
+
+    Entries are evicted least-recently-used first once the cache grows past
+    ``max_bytes``, and dropped entirely after ``max_idle`` seconds without use.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES, max_idle: int = CACHE_MAX_IDLE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, body BLOB, content_type TEXT, etag TEXT, last_modified TEXT,"
+                " stored_at REAL, accessed_at REAL, size INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        key = normalize_url(url)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT body, content_type, etag, last_modified, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        return CacheEntry(url, *row)
+
+    def put(self, url: str, body: bytes, content_type: str, etag: Optional[str], last_modified: Optional[str]):
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, body, content_type, etag, last_modified, now, now, len(body)),
+            )
+            self._total_bytes += len(body) - (old[0] if old else 0)
+            self._evict(conn)
+            conn.commit()
+
+    def touch(self, url: str):
+        """Mark an entry as freshly validated after a 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, normalize_url(url)))
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        cutoff = time.time() - self.max_idle
+        expired = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE accessed_at < ?", (cutoff,)).fetchone()[0]
+        if expired:
+            conn.execute("DELETE FROM entries WHERE accessed_at < ?", (cutoff,))
+            self._total_bytes -= expired
+        while self._total_bytes > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed_at LIMIT 100").fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in rows])
+            self._total_bytes -= sum(size for _, size in rows)
+        logger.debug(f"HTTP cache holds {self._total_bytes} bytes")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+http_cache = HTTPCache()
+
+
+def is_text_type(content_type: str) -> bool:
+    """True for text, HTML, XML and JSON media types, and when the server sent none."""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return not media_type or media_type.startswith("text/") or any(sub in media_type for sub in TEXT_SUBTYPES)
+
+
+async def read_body(response, max_bytes: int, on_chunk: Optional[Callable[[bytes], None]] = None) -> tuple:
+    """Read at most ``max_bytes`` of a response body in chunks. Returns ``(body, truncated)``.
+
+    ``on_chunk`` is called with each chunk as it arrives.
+    """
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+        body += chunk
+        if on_chunk is not None:
+            on_chunk(chunk[:len(chunk) - max(0, len(body) - max_bytes)])
+        if len(body) > max_bytes:
+            # Drop the rest of the download along with the connection
+            response.close()
+            return bytes(body[:max_bytes]), True
+    return bytes(body), False
+
+
+async def cached_get(url: str, cache_mode: str = CACHE_USE, ttl: Optional[int] = None,
+                     max_bytes: Optional[int] = None, text_only: bool = False,
+                     on_chunk: Optional[Callable[[bytes], None]] = None) -> CachedResponse:
+    """GET ``url`` through the shared session and the on-disk cache.
+
+    Fresh entries are served without a request. Stale entries (or every entry
+    with ``CACHE_REFRESH``) are revalidated with If-None-Match/If-Modified-Since.
+    Only complete 200 responses are stored. Network requests wait for the host's
+    rate limit and raise ``CircuitOpenError`` while the host's circuit is open.
+
+    Bodies are read in chunks and cut at ``max_bytes`` (``MAX_BODY_BYTES`` by
+    default). With ``text_only``, bodies that are not text, HTML, XML or JSON
+    are not read at all. Either way the response is marked ``truncated``.
+
+    ``on_chunk`` is fed the body of a 200 response piece by piece, as it is
+    downloaded or, for a cached body, once the entry is read.
+    """
+    ttl = CACHE_TTL if ttl is None else ttl
+    max_bytes = MAX_BODY_BYTES if max_bytes is None else max_bytes
+    entry = None
+    if cache_mode != CACHE_BYPASS:
+        entry = await asyncio.to_thread(http_cache.get, url)
+        if entry is not None and cache_mode == CACHE_USE and entry.is_fresh(ttl):
+            CACHE_RESULTS.inc(result="hit")
+            return _limited(CachedResponse(url, 200, entry.body, entry.content_type, "hit"), max_bytes, text_only,
+                            on_chunk)
+
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    host = host_label(url)
+    try:
+        circuit_breakers.check(url, probe=False)  # Do not wait for a token on a host that is failing
+        await host_scheduler.acquire(url)
+        # The circuit may have opened while we waited; if it is half-open this request is the probe
+        probe = circuit_breakers.check(url)
+    except CircuitOpenError:
+        ERRORS.inc(host=host, kind="circuit_open")
+        raise
+    try:
+        async with request_limiter.slot(url):
+            started = time.monotonic()
+            try:
+                async with get_session().get(url, headers=headers) as response:
+                    content_type = response.headers.get("Content-Type", "")
+                    skipped = text_only and response.status == 200 and not is_text_type(content_type)
+                    if skipped:
+                        response.close()
+                        body, truncated = b"", False
+                    else:
+                        body, truncated = await read_body(response, max_bytes,
+                                                          on_chunk if response.status == 200 else None)
+            except Exception as e:
+                host_scheduler.record(url, None, time.monotonic() - started)
+                circuit_breakers.record_failure(url)
+                ERRORS.inc(host=host, kind="timeout" if isinstance(e, asyncio.TimeoutError) else "network")
+                raise
+    except asyncio.CancelledError:
+        # A cancelled probe has no outcome; let the next request probe instead
+        if probe:
+            circuit_breakers.release_probe(url)
+        raise
+    latency = time.monotonic() - started
+    STAGE_SECONDS.observe(latency, stage="http_fetch")
+    PAGES_FETCHED.inc(host=host, source="http")
+    RESPONSE_BYTES.inc(len(body), host=host)
+    host_scheduler.record(url, response.status, latency, response.headers.get("Retry-After"))
+    if response.status >= 500:
+        circuit_breakers.record_failure(url)
+    else:
+        circuit_breakers.record_success(url)
+    if response.status >= 400:
+        ERRORS.inc(host=host, kind=f"http_{response.status // 100}xx")
+
+    if response.status == 304 and entry is not None:
+        await asyncio.to_thread(http_cache.touch, url)
+        CACHE_RESULTS.inc(result="revalidated")
+        return _limited(CachedResponse(url, 200, entry.body, entry.content_type, "revalidated"), max_bytes, text_only,
+                        on_chunk)
+    if response.status == 200 and cache_mode != CACHE_BYPASS and not truncated and not skipped:
+        await asyncio.to_thread(
+            http_cache.put, url, body, content_type,
+            response.headers.get("ETag"), response.headers.get("Last-Modified"),
+        )
+    cache_status = "bypass" if cache_mode == CACHE_BYPASS else "miss"
+    CACHE_RESULTS.inc(result=cache_status)
+    return CachedResponse(url, response.status, body, content_type, cache_status, truncated, skipped)
+
+
+def _limited(response: CachedResponse, max_bytes: int, text_only: bool,
+             on_chunk: Optional[Callable[[bytes], None]] = None) -> CachedResponse:
+    """Apply the read limits to a response served from the cache."""
+    if text_only and not response.is_text:
+        response.body, response.skipped = b"", True
+    elif len(response.body) > max_bytes:
+        response.body, response.truncated = response.body[:max_bytes], True
+    if on_chunk is not None:
+        for start in range(0, len(response.body), READ_CHUNK_SIZE):
+            on_chunk(response.body[start:start + READ_CHUNK_SIZE])
+    return response
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from aiohttp import ClientTimeout
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = 10  # Timeout for each HTTP request in seconds
+CONNECT_TIMEOUT = 5  # Fail fast on hosts that do not accept connections
+USER_AGENT = "Mozilla/5.0 (compatible; ScrapeMore/1.0)"
+
+# Connection pool settings, overridable from the environment
+MAX_CONCURRENT_REQUESTS = int(os.getenv("HTTP_MAX_CONCURRENT_REQUESTS", "64"))  # Across all hosts
+MAX_REQUESTS_PER_HOST = int(os.getenv("HTTP_MAX_REQUESTS_PER_HOST", "8"))
+DNS_CACHE_TTL = 300  # Seconds to cache DNS lookups
+KEEPALIVE_TIMEOUT = 30  # Seconds to keep an idle connection open for reuse
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+class RequestLimiter:
+    """Caps in-flight requests globally and per host.
+
+    Requests wait here rather than inside aiohttp's connector, so time spent
+    queueing never counts against the request timeout.
+    """
+
+    def __init__(self, total: int = MAX_CONCURRENT_REQUESTS, per_host: int = MAX_REQUESTS_PER_HOST):
+        self._total = asyncio.Semaphore(total)
+        self._hosts = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        # Take the host slot first so a busy host never holds a global slot while waiting
+        async with self._hosts[urlparse(url).netloc.lower()]:
+            async with self._total:
+                yield
+
+
+request_limiter = RequestLimiter()
+
+
+def create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONCURRENT_REQUESTS,
+        limit_per_host=MAX_REQUESTS_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=ClientTimeout(total=TIMEOUT, sock_connect=CONNECT_TIMEOUT),
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the shared HTTP session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = create_session()
+    return _session
+
+
+async def start_session():
+    get_session()
+    logger.info("Opened shared HTTP session")
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Closed shared HTTP session")
+    _session = None
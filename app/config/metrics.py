@@ -0,0 +1,134 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+from urllib.parse import urlsplit
+
+# Upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"  # Prometheus text exposition format
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels, safe to update from any thread."""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, safe to update from any thread."""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}  # Labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    le = _format_labels(self.labels, key, f'le="{bound:g}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = _format_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {series[-2]:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Pipeline stages: driver_acquire, page_load, http_fetch, parse, classify, extract_text,
+# serialize and pdf_page (one observation per PDF page, timed inside the worker)
+STAGE_SECONDS = registry.histogram("scraper_stage_seconds", "Time spent in each pipeline stage.", ["stage"])
+PAGES_FETCHED = registry.counter("scraper_pages_fetched_total", "Pages fetched, by host and source.",
+                                 ["host", "source"])
+RESPONSE_BYTES = registry.counter("scraper_response_bytes_total", "Response body bytes received, by host.", ["host"])
+CACHE_RESULTS = registry.counter("scraper_http_cache_total", "HTTP cache outcomes (hit, revalidated, miss, bypass).",
+                                 ["result"])
+ERRORS = registry.counter("scraper_errors_total", "Failed fetches, by host and kind.", ["host", "kind"])
+
+
+def host_label(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def timed(stage: str):
+    """Context manager recording the duration of a block under ``stage``."""
+    return STAGE_SECONDS.time(stage=stage)
@@ -1,8 +1,28 @@
-from pydantic import BaseModel
-from typing import List, Dict
+from pydantic import BaseModel, Field
+from typing import List, Dict, Literal, Optional
+
+from config.resilience import MAX_RETRIES
+from engine.budget import BATCH_CONCURRENCY, BATCH_MAX_PAGES, MAX_CRAWL_DEPTH, MAX_CRAWL_PAGES
 
 class URLRequest(BaseModel):
     url: str
+    render: bool = False  # Always render pages in the browser instead of trying plain HTTP first
+    max_depth: int = Field(MAX_CRAWL_DEPTH, ge=0, le=10)  # Archive levels followed below the start page
+    max_pages: int = Field(MAX_CRAWL_PAGES, ge=1, le=100_000)  # Pages fetched per crawl
+    discover: bool = True  # Read sitemaps and feeds first, and only crawl sites without a sitemap
+    render_profile: Optional[Literal["links", "full"]] = None  # Browser profile, "full" loads images, fonts and media
+    incremental: bool = False  # Revisit the archive pages of the last crawl and report added and removed URLs
+
+class BatchAnalyzeRequest(BaseModel):
+    urls: list[str] = Field(..., min_length=1, max_length=1000)  # Start page of each site
+    render: bool = False  # Always render pages in the browser instead of trying plain HTTP first
+    max_depth: int = Field(MAX_CRAWL_DEPTH, ge=0, le=10)  # Archive levels followed below each start page
+    max_pages: int = Field(MAX_CRAWL_PAGES, ge=1, le=100_000)  # Pages fetched per site
+    total_pages: int = Field(BATCH_MAX_PAGES, ge=1, le=1_000_000)  # Pages fetched across all sites
+    concurrency: int = Field(BATCH_CONCURRENCY, ge=1, le=256)  # Page fetches in flight across all sites
+    discover: bool = True  # Read sitemaps and feeds first, and only crawl sites without a sitemap
+    render_profile: Optional[Literal["links", "full"]] = None  # Browser profile, "full" loads images, fonts and media
+    incremental: bool = False  # Revisit the archive pages of each site's last crawl and report added and removed URLs
 
 class URLItem(BaseModel):
     category: str
@@ -10,9 +30,47 @@ class URLItem(BaseModel):
 
 class URLResponse(BaseModel):
     urls: list[URLItem]
+    sources: Dict[str, str] = {}  # Fetched page -> "http", "browser", "sitemap" or "feed"
+    added: Optional[list[URLItem]] = None  # Incremental crawls only: URLs new since the last crawl
+    removed: Optional[list[URLItem]] = None  # Incremental crawls only: URLs no longer found
 
 class URLListRequest(BaseModel):
     urls: list[str]
+    stream: bool = False  # Stream results as newline-delimited JSON instead of a file download
+    cache: Literal["use", "refresh", "bypass"] = "use"  # "refresh" always revalidates, "bypass" skips the cache
+    cache_ttl: Optional[int] = None  # Seconds a cached page is served without revalidation
+    retries: int = Field(MAX_RETRIES, ge=0, le=5)  # Extra attempts for network errors, timeouts and 429/5xx
+    hedge_after: Optional[float] = Field(None, gt=0)  # Race a second request if the first is slower than this
+    mode: Literal["html", "text"] = "html"  # "text" returns the title, description and main text instead of markup
+    render_profile: Optional[Literal["links", "full"]] = None  # Browser profile, "full" loads images, fonts and media
+    max_bytes: Optional[int] = Field(None, ge=1024)  # Bytes read per page before the body is truncated
+    # Parquet needs pyarrow and zstd needs zstandard (both in requirements.txt); without them the request is a 400
+    format: Optional[Literal["json", "ndjson", "csv", "parquet"]] = None  # Download format; JSON, or CSV for links
+    compression: Optional[Literal["gzip", "zstd"]] = None  # Compress the downloaded file itself (.gz or .zst)
+
+class ScrapeResult(BaseModel):
+    url: str
+    status: Optional[int] = None  # HTTP status, None when no response was received
+    content: str  # Raw HTML, or the page's main text in "text" mode
+    title: Optional[str] = None  # Only set in "text" mode
+    description: Optional[str] = None  # Only set in "text" mode
+    attempts: int = 1
+    short_circuited: bool = False  # Not requested because the host's circuit breaker was open
+    truncated: bool = False  # The body passed the byte limit
+    skipped: Optional[str] = None  # Why the body was not read, e.g. it is not a text document
 
 class ContentResponse(BaseModel):
-    contents: dict
\ No newline at end of file
+    contents: dict
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued, running, completed, failed or cancelled
+    payload: dict
+    total: Optional[int] = None
+    done: int = 0
+    failed: int = 0
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
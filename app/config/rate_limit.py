@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from config.http_client import USER_AGENT, get_session, request_limiter
+
+logger = logging.getLogger(__name__)
+
+# Per-host request rates in requests per second, overridable from the environment
+INITIAL_RATE = float(os.getenv("HOST_INITIAL_RATE", "4"))
+MIN_RATE = 0.2
+MAX_RATE = float(os.getenv("HOST_MAX_RATE", "20"))
+BURST = 4  # Requests a host may receive back to back after being idle
+RATE_INCREASE = 0.5  # Added to the rate after each healthy response
+THROTTLE_FACTOR = 0.5  # Rate multiplier after 429/503
+ERROR_FACTOR = 0.75  # Rate multiplier after other server errors
+SLOW_FACTOR = 0.9  # Rate multiplier when a response is much slower than usual
+SLOW_LATENCY_RATIO = 2.0  # "Much slower" means this many times the moving average
+LATENCY_SMOOTHING = 0.2  # Weight of the newest sample in the latency moving average
+MAX_RETRY_AFTER = 300  # Longest Retry-After pause honoured, in seconds
+ROBOTS_TTL = 3600  # Seconds a host's robots.txt is trusted
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        delay = parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+class HostBucket:
+    """Token bucket for one host whose rate adapts to how the host responds.
+
+    Healthy responses raise the rate additively; throttling, server errors and
+    latency spikes cut it multiplicatively. The rate never exceeds the
+    robots.txt crawl-delay once that is known.
+    """
+
+    def __init__(self, rate: float = INITIAL_RATE):
+        self.rate = rate
+        self.max_rate = MAX_RATE
+        self.tokens = float(BURST)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.latency: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def limit_rate(self, max_rate: float):
+        self.max_rate = max(MIN_RATE, min(MAX_RATE, max_rate))
+        self.rate = min(self.rate, self.max_rate)
+        self.tokens = min(self.tokens, 1.0)
+
+    async def acquire(self):
+        # The lock makes waiters take tokens in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(max(1.0, min(BURST, self.rate)), self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def record(self, status: Optional[int], latency: float, retry_after: Optional[float] = None):
+        """Adapt the rate to one response.
+
+        ``status`` is None for network failures, which leave the rate alone:
+        a host that stops answering is the circuit breaker's job.
+        """
+        if status is None:
+            return
+        if status in (429, 503):
+            self.rate = max(MIN_RATE, self.rate * THROTTLE_FACTOR)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        elif status >= 500:
+            self.rate = max(MIN_RATE, self.rate * ERROR_FACTOR)
+        elif self.latency is not None and latency > self.latency * SLOW_LATENCY_RATIO:
+            self.rate = max(MIN_RATE, self.rate * SLOW_FACTOR)
+        else:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+        self.latency = latency if self.latency is None else (
+            LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency
+        )
+
+
+class HostScheduler:
+    """Per-host politeness scheduler shared by scraping and crawling.
+
+    Call ``acquire(url)`` before each request to the network and ``record()``
+    with the outcome afterwards. The first request to a host also loads its
+    robots.txt so a Crawl-delay or Request-rate caps the host's rate.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, HostBucket] = {}
+        self._robots: Dict[str, asyncio.Task] = {}
+        self._robots_loaded: Dict[str, float] = {}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def bucket(self, url: str) -> HostBucket:
+        host = self.host_of(url)
+        if host not in self._buckets:
+            self._buckets[host] = HostBucket()
+        return self._buckets[host]
+
+    async def acquire(self, url: str):
+        await self._apply_robots(url)
+        await self.bucket(url).acquire()
+
+    def record(self, url: str, status: Optional[int], latency: float, retry_after: Optional[str] = None):
+        delay = parse_retry_after(retry_after)
+        if status in (429, 503):
+            logger.warning(f"{self.host_of(url)} throttled us (status {status}, retry after {delay}s)")
+        self.bucket(url).record(status, latency, delay)
+
+    async def _apply_robots(self, url: str):
+        host = self.host_of(url)
+        if time.monotonic() - self._robots_loaded.get(host, -ROBOTS_TTL) < ROBOTS_TTL:
+            return
+        # Concurrent first requests to a host share one robots.txt fetch
+        task = self._robots.get(host)
+        if task is None:
+            task = self._robots[host] = asyncio.create_task(self._load_robots(host))
+        try:
+            await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._robots.pop(host, None)
+
+    async def _load_robots(self, host: str):
+        delay = None
+        try:
+            async with request_limiter.slot(host), get_session().get(f"{host}/robots.txt") as response:
+                if response.status == 200:
+                    parser = RobotFileParser()
+                    parser.parse((await response.text(errors="replace")).splitlines())
+                    delay = parser.crawl_delay(USER_AGENT)
+                    request_rate = parser.request_rate(USER_AGENT)
+                    if request_rate and request_rate.requests:
+                        delay = max(delay or 0, request_rate.seconds / request_rate.requests)
+        except Exception as e:
+            logger.info(f"Could not load robots.txt for {host}: {e}")
+        self._robots_loaded[host] = time.monotonic()
+        if delay:
+            logger.info(f"Honouring robots.txt crawl delay of {delay}s for {host}")
+            self.bucket(host).limit_rate(1 / float(delay))
+
+
+host_scheduler = HostScheduler()
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Retry settings, overridable from the environment
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))  # Extra attempts after the first one
+BACKOFF_BASE = 0.5  # Seconds; the n-th retry waits up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 10.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Circuit breaker settings
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))  # Consecutive failures that open a host's circuit
+BREAKER_RESET_TIMEOUT = 30.0  # Seconds before an open circuit lets a probe request through
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+    def __init__(self, host: str):
+        super().__init__(f"Circuit open for {host}, host is failing")
+        self.host = host
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, max_delay: float = BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt`` (1-based)."""
+    return random.uniform(0, min(max_delay, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Closed, open or half-open circuit for one host.
+
+    ``failures`` consecutive failures open the circuit. After ``reset_timeout``
+    one probe request is let through; its outcome closes or reopens it. A
+    probe that ends without an outcome, e.g. cancelled, must be released
+    with ``release_probe()`` so the next request can probe instead.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.max_failures = failures
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    def is_blocked(self) -> bool:
+        """Would ``allow()`` refuse a request right now? Never takes the probe."""
+        if self.opened_at is None:
+            return False
+        return self.probing or time.monotonic() - self.opened_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if not self.is_blocked():
+            self.probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.max_failures:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+
+class CircuitBreakers:
+    """Circuit breakers keyed by host."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker()
+        return self._breakers[host]
+
+    def check(self, url: str, probe: bool = True) -> bool:
+        """Raise ``CircuitOpenError`` if the host's circuit is open.
+
+        Returns True when this call took the half-open probe; the caller must
+        then record an outcome or ``release_probe()``. With ``probe=False``
+        the circuit is only inspected, for a quick check before waiting.
+        """
+        breaker = self._breaker(url)
+        if not probe:
+            if breaker.is_blocked():
+                raise CircuitOpenError(urlsplit(url).netloc.lower())
+            return False
+        was_open = breaker.opened_at is not None
+        if not breaker.allow():
+            raise CircuitOpenError(urlsplit(url).netloc.lower())
+        return was_open
+
+    def release_probe(self, url: str):
+        self._breaker(url).release_probe()
+
+    def record_success(self, url: str):
+        self._breaker(url).record_success()
+
+    def record_failure(self, url: str):
+        breaker = self._breaker(url)
+        was_open = breaker.opened_at is not None
+        breaker.record_failure()
+        if breaker.opened_at is not None and not was_open:
+            logger.warning(f"Opened circuit for {urlsplit(url).netloc} after {breaker.failures} failure(s)")
+
+
+circuit_breakers = CircuitBreakers()
+
+
+async def hedged(call: Callable[[], Awaitable[T]], hedge_after: Optional[float]) -> T:
+    """Await ``call()``; if it has not finished after ``hedge_after`` seconds, race a second copy.
+
+    The first successful result wins and the other attempt is cancelled. If both
+    fail, the first attempt's error is raised.
+    """
+    if not hedge_after:
+        return await call()
+    tasks = [asyncio.ensure_future(call())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            tasks.append(asyncio.ensure_future(call()))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        return tasks[0].result()
+    finally:
+        for task in tasks:
+            task.cancel()
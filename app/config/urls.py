@@ -0,0 +1,76 @@
+import logging
+from typing import Iterable, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "yclid", "_ga", "ref_src",
+})
+TRACKING_PREFIXES = ("utm_",)
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL used for fetching and caching.
+
+    Lowercases the scheme and host, drops a default port and the fragment and
+    gives an empty path a single slash. User info, IPv6 brackets and the query
+    are kept as they are: the server sees the query it was linked with, and
+    only ``url_key`` reorders it. Raises ValueError for a URL that cannot be
+    parsed, such as one with an unclosed IPv6 bracket or a non-numeric port.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    port = parts.port
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    userinfo, at, _ = parts.netloc.rpartition("@")
+    if at:
+        netloc = f"{userinfo}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def normalize_urls(urls: Iterable[str]) -> List[str]:
+    """``normalize_url`` for each URL, skipping the ones that cannot be parsed."""
+    normalized = []
+    for url in urls:
+        try:
+            normalized.append(normalize_url(url))
+        except ValueError as e:
+            logger.debug("Skipped malformed URL %r: %s", url, e)
+    return normalized
+
+
+def url_key(url: str) -> str:
+    """Dedup key for a URL: its normalized form, ignoring the scheme and a trailing slash.
+
+    Tracking parameters (utm_*, fbclid, ...) are dropped and the others sorted,
+    so ``http://example.com/post/?b=2&a=1`` and
+    ``https://Example.com/post?a=1&b=2&utm_source=x#top`` share a key. Keys are
+    never fetched, so re-encoding the query here is harmless.
+    """
+    parts = urlsplit(normalize_url(url))
+    path = parts.path
+    if len(path) > 1 and path.endswith("/"):
+        path = path[:-1]
+    query = parts.query
+    if query:
+        params = [(name, value) for name, value in parse_qsl(query, keep_blank_values=True) if not is_tracking_param(name)]
+        query = urlencode(sorted(params))
+    return f"{parts.netloc}{path}?{query}" if query else f"{parts.netloc}{path}"
+
+
+def site_host(url: str) -> str:
+    """Host of a URL without a leading ``www.``, used to keep crawls on one site."""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
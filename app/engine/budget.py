@@ -0,0 +1,65 @@
+import asyncio
+import os
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+# Crawl limits, overridable from the environment; also the API request defaults
+MAX_CRAWL_DEPTH = 1  # Archive levels followed below the start page
+MAX_CRAWL_PAGES = int(os.getenv("MAX_CRAWL_PAGES", "500"))  # Pages fetched per crawl
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))  # Page fetches at once across a batch of sites
+BATCH_MAX_PAGES = int(os.getenv("BATCH_MAX_PAGES", "5000"))  # Pages fetched across a batch of sites
+
+
+class CrawlBudget:
+    """Page budget and fetch slots shared by crawls of many sites.
+
+    At most ``concurrency`` fetches run at once across every site. When all
+    slots are busy, a freed slot goes to the next waiting site in turn, so one
+    large site cannot starve the others. ``take_page()`` spends one page of
+    the ``max_pages`` shared by all sites and returns False once none are left.
+    Use it from one event loop only.
+    """
+
+    def __init__(self, max_pages: int, concurrency: int):
+        self.pages_left = max_pages
+        self._free = concurrency
+        self._waiters: "OrderedDict[str, deque]" = OrderedDict()  # Site -> waiting futures, in turn order
+
+    def take_page(self) -> bool:
+        if self.pages_left <= 0:
+            return False
+        self.pages_left -= 1
+        return True
+
+    @asynccontextmanager
+    async def slot(self, site: str):
+        """Hold one of the shared fetch slots for the duration of a ``with`` block."""
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(site, deque()).append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # A slot handed over just as we were cancelled must go to someone else
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        while self._waiters:
+            site, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(site)  # The site waits for its next turn behind the others
+            else:
+                del self._waiters[site]
+            if not waiter.done():  # Skip waiters cancelled while queued
+                waiter.set_result(None)
+                return
+        self._free += 1
@@ -0,0 +1,101 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Sorts URLs whose path matches ``pattern`` into ``bucket``.
+
+    ``label`` is formatted with the match's named groups, capitalized, so a
+    ``(?P<name>...)`` group can appear in it as ``{name}``. ``accept`` can
+    reject a match the pattern alone cannot (e.g. page numbers above a limit).
+    """
+    bucket: str
+    pattern: re.Pattern
+    label: str
+    accept: Optional[Callable[[re.Match], bool]] = None
+
+    def describe(self, match: re.Match) -> str:
+        groups = {key: (value or "").capitalize() for key, value in match.groupdict().items()}
+        return self.label.format(**groups)
+
+
+def rule(bucket: str, pattern: str, label: str, accept: Optional[Callable[[re.Match], bool]] = None) -> Rule:
+    """Build a rule with its pattern compiled once, case-insensitively."""
+    return Rule(bucket, re.compile(pattern, re.IGNORECASE), label, accept)
+
+
+MAX_PAGE_NUMBER = 100
+
+PAGE_RULE = rule("pages", r"^/pages?/(?P<number>\d+)(?:/|$)", "Pages",
+                 accept=lambda match: int(match.group("number")) <= MAX_PAGE_NUMBER)
+TAG_RULE = rule("tags", r"/tag/(?P<name>[^/]+)", "{name}")
+CATEGORY_RULE = rule("categories", r"/category/(?P<name>[^/]+)", "{name}")
+
+DEFAULT_RULES = (PAGE_RULE, TAG_RULE, CATEGORY_RULE)
+
+# Pulls the path out of an absolute URL; several times cheaper than urlsplit
+URL_PATH_PATTERN = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*://[^/?#]*([^?#]*)')
+
+
+def url_path(url: str) -> str:
+    match = URL_PATH_PATTERN.match(url)
+    return match.group(1) if match else urlsplit(url).path
+
+
+class URLClassifier:
+    """Single-pass URL classifier.
+
+    Each URL is parsed once and placed in the bucket of the first rule that
+    matches its path. Duplicates are dropped and every bucket is sorted by URL,
+    so the output does not depend on the input order.
+
+    Paths that match no rule are rejected by one combined regex, and results
+    are memoized per URL because the crawl classifies the same links again
+    when building the response.
+    """
+
+    def __init__(self, rules: Sequence[Rule] = DEFAULT_RULES, cache_size: int = 65536):
+        self.rules = tuple(rules)
+        self.buckets = list(dict.fromkeys(r.bucket for r in self.rules))
+        # Named groups may repeat across rules, so the combined pattern drops their names
+        self._any_rule = re.compile(
+            "|".join(f"(?:{re.sub(r'[(][?]P<[^>]+>', '(?:', r.pattern.pattern)})" for r in self.rules),
+            re.IGNORECASE,
+        )
+        self._classify_url = lru_cache(maxsize=cache_size)(self._classify_one)
+
+    def _classify_one(self, url: str) -> Optional[Tuple[str, str]]:
+        path = url_path(url)
+        if not self._any_rule.search(path):
+            return None
+        for r in self.rules:
+            match = r.pattern.search(path)
+            if match and (r.accept is None or r.accept(match)):
+                return r.bucket, r.describe(match)
+        return None
+
+    def classify(self, urls: Iterable[str]) -> Dict[str, List[Dict[str, str]]]:
+        found: Dict[str, Dict[str, str]] = {bucket: {} for bucket in self.buckets}
+        classify_url = self._classify_url
+        for url in set(urls):
+            result = classify_url(url)
+            if result is not None:
+                bucket, label = result
+                found[bucket][url] = label
+
+        return {
+            bucket: [{'category': labels[url], 'link': url} for url in sorted(labels)]
+            for bucket, labels in found.items()
+        }
+
+
+url_classifier = URLClassifier()
+
+
+def classify_urls(urls: Iterable[str]) -> Dict[str, List[Dict[str, str]]]:
+    """Classify URLs into pages, tags and categories with the default rules."""
+    return url_classifier.classify(urls)
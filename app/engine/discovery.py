@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import os
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from aiohttp import ClientError
+from lxml import etree
+
+from config.http_cache import cached_get
+from config.metrics import timed
+from config.resilience import CircuitOpenError
+from config.urls import normalize_url, site_host, url_key
+from engine.fetch import FetchOptions, fetch_static_html
+
+logger = logging.getLogger(__name__)
+
+# Discovery settings, overridable from the environment
+MAX_DISCOVERED_URLS = int(os.getenv("MAX_DISCOVERED_URLS", "50000"))
+MAX_SITEMAPS = int(os.getenv("MAX_SITEMAPS", "50"))  # Sitemap documents fetched per site, indexes included
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024  # Uncompressed size limit from the sitemap protocol
+SITEMAP_CONCURRENCY = 4
+PARSE_CHUNK_SIZE = 64 * 1024  # Bytes fed to the pull parser at a time
+
+SITEMAP_PATHS = ("/sitemap.xml", "/sitemap_index.xml")  # Tried when robots.txt names no sitemap
+FEED_PATHS = ("/feed/", "/rss.xml", "/atom.xml", "/feed.xml", "/index.xml")  # Tried when the home page links none
+FEED_TYPES = ("application/rss+xml", "application/atom+xml")
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class Discovery:
+    urls: List[str] = field(default_factory=list)
+    sources: Dict[str, str] = field(default_factory=dict)  # Document URL -> "sitemap" or "feed"
+    sitemap_urls: int = 0  # Page URLs taken from sitemaps, not counting sitemap indexes
+
+    @property
+    def has_sitemap(self) -> bool:
+        """Did sitemaps list any page? An index whose sitemaps all fail does not count."""
+        return self.sitemap_urls > 0
+
+
+class _FeedLinkCollector:
+    """lxml parser target that records ``<link rel="alternate">`` feed URLs."""
+
+    def __init__(self):
+        self.hrefs: List[str] = []
+
+    def start(self, tag, attrib):
+        if tag == "link" and "alternate" in (attrib.get("rel") or "").lower().split():
+            if (attrib.get("type") or "").lower() in FEED_TYPES and attrib.get("href"):
+                self.hrefs.append(attrib["href"])
+
+    def close(self):
+        return self
+
+
+def _local_name(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+class URLDocumentParser:
+    """Incremental parser for sitemaps, sitemap indexes, RSS and Atom documents.
+
+    Chunks are fed as they are downloaded, gunzipped and parsed on the spot,
+    and each entry is freed once read, so even a 50 MB sitemap is never held
+    as a full tree. ``close()`` returns ``(page_urls, child_sitemaps)``.
+    """
+
+    def __init__(self):
+        self.pages: List[str] = []
+        self.sitemaps: List[str] = []
+        self.done = False  # Past the size or URL limit; later chunks are ignored
+        self._parser = etree.XMLPullParser(events=("end",), recover=True, resolve_entities=False, no_network=True)
+        self._head = b""  # First bytes, held until there are enough to spot gzip
+        self._decompressor = None
+        self._sniffed = False
+        self._total = 0
+
+    def feed(self, chunk: bytes):
+        if self.done:
+            return
+        if not self._sniffed:
+            self._head += chunk
+            if len(self._head) < len(GZIP_MAGIC):
+                return
+            chunk, self._head, self._sniffed = self._head, b"", True
+            if chunk[:2] == GZIP_MAGIC:
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is None:
+            self._parse(chunk)
+            return
+        # Output is capped per call; the input it has not reached yet waits in unconsumed_tail
+        self._parse(self._decompressor.decompress(chunk, PARSE_CHUNK_SIZE))
+        while self._decompressor.unconsumed_tail and not self.done:
+            self._parse(self._decompressor.decompress(self._decompressor.unconsumed_tail, PARSE_CHUNK_SIZE))
+
+    def close(self) -> Tuple[List[str], List[str]]:
+        if not self._sniffed:
+            self._sniffed = True
+            self._parse(self._head)
+        elif self._decompressor is not None:
+            self._parse(self._decompressor.flush())
+        return self.pages, self.sitemaps
+
+    def _parse(self, data: bytes):
+        if self.done or not data:
+            return
+        self._total += len(data)
+        if self._total > MAX_SITEMAP_BYTES:
+            logger.warning("Stopped parsing a sitemap past its size limit")
+            self.done = True
+            return
+        with timed("parse"):
+            self._parser.feed(data)
+            for _, element in self._parser.read_events():
+                name = _local_name(element.tag)
+                if name == "loc":
+                    parent = _local_name(element.getparent().tag) if element.getparent() is not None else ""
+                    if element.text and element.text.strip():
+                        (self.sitemaps if parent == "sitemap" else self.pages).append(element.text.strip())
+                elif name == "link":
+                    # RSS items carry the URL as text, Atom entries in href
+                    href = element.get("href") if element.get("rel", "alternate") == "alternate" else None
+                    link = href or (element.text or "").strip()
+                    if link and _local_name(element.getparent().tag) in ("item", "entry"):
+                        self.pages.append(link)
+                elif name in ("url", "sitemap", "item", "entry"):
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del element.getparent()[0]
+        if len(self.pages) >= MAX_DISCOVERED_URLS:
+            self.done = True
+
+
+def parse_url_document(body: bytes) -> Tuple[List[str], List[str]]:
+    """Return ``(page_urls, child_sitemaps)`` from a whole sitemap, sitemap index, RSS or Atom document."""
+    parser = URLDocumentParser()
+    for start in range(0, len(body), PARSE_CHUNK_SIZE):
+        parser.feed(body[start:start + PARSE_CHUNK_SIZE])
+    return parser.close()
+
+
+async def _fetch_document(url: str, options: FetchOptions,
+                          on_chunk: Optional[Callable[[bytes], None]] = None) -> Optional[bytes]:
+    try:
+        response = await cached_get(url, options.cache_mode, options.cache_ttl, max_bytes=MAX_SITEMAP_BYTES,
+                                    on_chunk=on_chunk)
+    except (ClientError, asyncio.TimeoutError, CircuitOpenError) as e:
+        logger.info(f"Could not fetch {url}: {e}")
+        return None
+    if response.status != 200 or not response.body.strip():
+        return None
+    return response.body
+
+
+async def _robots_sitemaps(root: str, options: FetchOptions) -> List[str]:
+    body = await _fetch_document(urljoin(root, "/robots.txt"), options)
+    if body is None:
+        return []
+    sitemaps = []
+    for line in body.decode("utf-8", errors="replace").splitlines():
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "sitemap" and value.strip():
+            sitemaps.append(value.strip())
+    return _join_all(root, sitemaps)
+
+
+async def _feed_urls(root: str, options: FetchOptions) -> List[str]:
+    html = await fetch_static_html(root, options)
+    if not html:
+        return [urljoin(root, path) for path in FEED_PATHS]
+    collector = _FeedLinkCollector()
+    parser = etree.HTMLParser(target=collector)
+    parser.feed(html)
+    parser.close()
+    if not collector.hrefs:
+        return [urljoin(root, path) for path in FEED_PATHS]
+    return _join_all(root, collector.hrefs)
+
+
+def _join_all(base: str, hrefs: List[str]) -> List[str]:
+    """Resolve each href against ``base``, skipping malformed ones."""
+    urls = []
+    for href in hrefs:
+        try:
+            urls.append(urljoin(base, href))
+        except ValueError:
+            logger.debug("Skipped malformed URL %r in %s", href, base)
+    return urls
+
+
+async def _read_documents(urls: List[str], kind: str, options: FetchOptions, discovery: Discovery,
+                          site: str, seen: set, follow_indexes: bool = False):
+    """Fetch and parse documents breadth-first, following nested sitemap indexes."""
+    semaphore = asyncio.Semaphore(SITEMAP_CONCURRENCY)
+    fetched: set = set()
+    budget = MAX_SITEMAPS
+
+    async def read(url: str):
+        parser = URLDocumentParser()
+        async with semaphore:
+            # Parsed while it downloads, so nothing waits for the whole body
+            body = await _fetch_document(url, options, on_chunk=parser.feed)
+        if body is None:
+            return url, None
+        return url, parser.close()
+
+    level = list(dict.fromkeys(urls))
+    while level and budget > 0 and len(discovery.urls) < MAX_DISCOVERED_URLS:
+        level = [url for url in level if url not in fetched][:budget]
+        fetched.update(level)
+        budget -= len(level)
+        next_level = []
+        for url, parsed in await asyncio.gather(*[read(url) for url in level]):
+            if parsed is None:
+                continue
+            pages, sitemaps = parsed
+            if pages or sitemaps:
+                discovery.sources[url] = kind
+            for page in pages:
+                try:
+                    page = normalize_url(urljoin(url, page))
+                except ValueError:
+                    continue  # A malformed <loc> does not spoil the rest of the document
+                key = url_key(page)
+                if key not in seen and site_host(page) == site and len(discovery.urls) < MAX_DISCOVERED_URLS:
+                    seen.add(key)
+                    discovery.urls.append(page)
+                    if kind == "sitemap":
+                        discovery.sitemap_urls += 1
+            if follow_indexes:
+                next_level.extend(_join_all(url, sitemaps))
+        level = next_level
+
+
+async def discover_site_urls(url: str, options: Optional[FetchOptions] = None) -> Discovery:
+    """Find a site's URLs from its sitemaps, or from its RSS/Atom feeds, over plain HTTP.
+
+    Sitemaps come from robots.txt ``Sitemap:`` lines, falling back to the usual
+    locations; gzipped sitemaps and nested sitemap indexes are followed up to
+    ``MAX_SITEMAPS`` documents. Feeds are read when no sitemap lists anything.
+    Only URLs on the same site are kept.
+    """
+    options = options or FetchOptions()
+    root = normalize_url(url)
+    site = site_host(root)
+    discovery = Discovery()
+    seen: set = set()
+
+    sitemaps = await _robots_sitemaps(root, options) or [urljoin(root, path) for path in SITEMAP_PATHS]
+    await _read_documents(sitemaps, "sitemap", options, discovery, site, seen, follow_indexes=True)
+    if not discovery.urls:
+        await _read_documents(await _feed_urls(root, options), "feed", options, discovery, site, seen)
+
+    logger.info(f"Discovered {len(discovery.urls)} URL(s) for {url} from {len(discovery.sources)} document(s)")
+    return discovery
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from lxml import etree, html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 2)))  # Parser processes
+INLINE_EXTRACT_BYTES = 32 * 1024  # Smaller pages are parsed on the event loop; shipping them to a process costs more
+
+# Elements that never hold a page's main text
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "iframe", "form",
+                    "nav", "header", "footer", "aside", "button", "select")
+BLOCK_TAGS = frozenset({"p", "div", "section", "article", "main", "li", "ul", "ol", "table", "tr",
+                        "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "br", "dd", "dt", "figcaption"})
+
+WHITESPACE_PATTERN = re.compile(r"[ \t\r\f\v\u00a0]+")
+BLANK_LINES_PATTERN = re.compile(r"\n\s*\n+")
+# lxml refuses str input that still carries an encoding declaration
+XML_DECLARATION_PATTERN = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _clean(text: Optional[str]) -> str:
+    return WHITESPACE_PATTERN.sub(" ", text or "").strip()
+
+
+def _main_element(root):
+    """The page's <article> or <main> when it has exactly one, otherwise <body>."""
+    for tag in ("article", "main"):
+        found = root.findall(f".//{tag}")
+        if len(found) == 1:
+            return found[0]
+    body = root.find(".//body")
+    return body if body is not None else root
+
+
+def _block_text(element) -> str:
+    # Break lines at block elements so paragraphs do not run together
+    parts = []
+    for event, node in etree.iterwalk(element, events=("start", "end")):
+        if not isinstance(node.tag, str):
+            if event == "end" and node.tail:
+                parts.append(node.tail)
+            continue
+        if event == "start":
+            if node.tag in BLOCK_TAGS:
+                parts.append("\n")
+            if node.text:
+                parts.append(node.text)
+        else:
+            if node.tag in BLOCK_TAGS:
+                parts.append("\n")
+            if node.tail and node is not element:
+                parts.append(node.tail)
+    lines = (_clean(line) for line in "".join(parts).split("\n"))
+    return BLANK_LINES_PATTERN.sub("\n", "\n".join(line for line in lines if line)).strip()
+
+
+def extract_text(html: str) -> Dict[str, str]:
+    """Return the ``title``, meta ``description`` and main ``text`` of an HTML page.
+
+    Scripts, styles, navigation, headers, footers and forms are dropped, and
+    the text of a single <article> or <main> is preferred over the whole body.
+    """
+    if not html or not html.strip():
+        return {"title": "", "description": "", "text": ""}
+    try:
+        root = lxml_html.document_fromstring(XML_DECLARATION_PATTERN.sub("", html, count=1))
+    except (etree.ParserError, ValueError):
+        return {"title": "", "description": "", "text": ""}
+
+    title = root.find(".//title")
+    description = ""
+    for meta in root.iter("meta"):
+        name = (meta.get("name") or meta.get("property") or "").lower()
+        if name in ("description", "og:description") and meta.get("content"):
+            description = _clean(meta.get("content"))
+            if name == "description":
+                break
+
+    for element in list(root.iter(*BOILERPLATE_TAGS)):
+        element.drop_tree()
+    return {
+        "title": _clean(title.text_content()) if title is not None else "",
+        "description": description,
+        "text": _block_text(_main_element(root)),
+    }
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared parser process pool, starting it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS)
+        logger.info(f"Started text extraction pool with {EXTRACT_WORKERS} process(es)")
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def extract_page_text(html: str) -> Dict[str, str]:
+    """Run ``extract_text`` in the process pool, or inline for small pages."""
+    if len(html) < INLINE_EXTRACT_BYTES:
+        return extract_text(html)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), extract_text, html)
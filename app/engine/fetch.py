@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from aiohttp import ClientError
+
+from config.driver import DEFAULT_RENDER_PROFILE
+from config.driver_pool import render_page
+from config.http_cache import CACHE_USE, cached_get
+from config.metrics import ERRORS, PAGES_FETCHED, host_label
+from config.rate_limit import host_scheduler
+from config.resilience import MAX_RETRIES, CircuitOpenError, circuit_breakers
+
+logger = logging.getLogger(__name__)
+
+MIN_STATIC_ANCHORS = 5  # Fewer links than this in the raw HTML means the page is probably rendered by JS
+
+# Markers left behind by client-side frameworks when the HTML is only an empty shell
+JS_SHELL_MARKERS = (
+    '<div id="root"></div>',
+    '<div id="app"></div>',
+    'you need to enable javascript to run this app',
+)
+
+ANCHOR_PATTERN = re.compile(r'<a\s[^>]*href', re.IGNORECASE)
+
+
+@dataclass
+class FetchOptions:
+    force_render: bool = False  # Skip the plain HTTP attempt
+    cache_mode: str = CACHE_USE  # See config.http_cache
+    cache_ttl: Optional[int] = None
+    retries: int = MAX_RETRIES  # Used when scraping, see config.resilience
+    hedge_after: Optional[float] = None
+    content_mode: str = "html"  # "html" or "text", used when scraping
+    render_profile: str = DEFAULT_RENDER_PROFILE  # "links" or "full", see config.driver
+    max_bytes: Optional[int] = None  # Response bodies are cut here, see config.http_cache
+
+    @classmethod
+    def from_request(cls, request) -> "FetchOptions":
+        """Build options from whichever fetch settings an API request model carries."""
+        return cls(
+            force_render=getattr(request, "render", False),
+            cache_mode=getattr(request, "cache", CACHE_USE),
+            cache_ttl=getattr(request, "cache_ttl", None),
+            retries=getattr(request, "retries", MAX_RETRIES),
+            hedge_after=getattr(request, "hedge_after", None),
+            content_mode=getattr(request, "mode", "html"),
+            render_profile=getattr(request, "render_profile", None) or DEFAULT_RENDER_PROFILE,
+            max_bytes=getattr(request, "max_bytes", None),
+        )
+
+
+class PageFetchError(Exception):
+    """Raised when a page cannot be used: an error status or a response that is not HTML."""
+
+    def __init__(self, url: str, reason: str, status: Optional[int] = None):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.status = status
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    html: str
+    source: str  # "http" or "browser"
+
+
+async def fetch_page(url: str, options: Optional[FetchOptions] = None) -> FetchedPage:
+    """Fetch a page with plain HTTP, rendering it in a browser only when needed.
+
+    Only a 200 HTML page that ``needs_rendering()`` flags is rendered. Error
+    statuses and non-HTML responses raise ``PageFetchError``, and network
+    failures propagate, as a browser would not do any better.
+    """
+    options = options or FetchOptions()
+    if not options.force_render:
+        html = await _get_html(url, options)
+        if not needs_rendering(html):
+            return FetchedPage(url=url, html=html, source="http")
+        logger.info(f"Falling back to browser rendering for: {url}")
+
+    host = host_label(url)
+    try:
+        circuit_breakers.check(url, probe=False)  # Do not wait for a token on a host that is failing
+        await host_scheduler.acquire(url)  # Browser loads count against the host's rate like any other request
+        probe = circuit_breakers.check(url)
+    except CircuitOpenError:
+        ERRORS.inc(host=host, kind="circuit_open")
+        raise
+    try:
+        html = await render_page(url, options.render_profile)
+    except BaseException as e:
+        # A browser failure may be ours rather than the host's, so it is no outcome for the probe
+        if probe:
+            circuit_breakers.release_probe(url)
+        if isinstance(e, Exception):
+            ERRORS.inc(host=host, kind="browser")
+        raise
+    # The browser does not report the response status, so the render is not recorded
+    # with host_scheduler: the rate only adapts to plain HTTP responses, including the
+    # 200 that led here, and a fake 200 must not undo a cut after 429/503
+    if probe:
+        circuit_breakers.record_success(url)
+    PAGES_FETCHED.inc(host=host, source="browser")
+    return FetchedPage(url=url, html=html, source="browser")
+
+
+async def fetch_static_html(url: str, options: Optional[FetchOptions] = None) -> Optional[str]:
+    """GET a page without a browser. Returns None when the response is not usable HTML."""
+    options = options or FetchOptions()
+    try:
+        return await _get_html(url, options)
+    except PageFetchError as e:
+        logger.info(f"Static fetch of {e}")
+        return None
+    except (ClientError, asyncio.TimeoutError) as e:
+        logger.warning(f"Static fetch of {url} failed: {e}")
+        return None
+
+
+async def _get_html(url: str, options: FetchOptions) -> str:
+    response = await cached_get(url, options.cache_mode, options.cache_ttl, options.max_bytes, text_only=True)
+    if response.status != 200:
+        raise PageFetchError(url, f"status {response.status}", response.status)
+    if "html" not in (response.content_type or "text/html").lower():
+        raise PageFetchError(url, f"not HTML ({response.content_type})", response.status)
+    return response.text()
+
+
+def needs_rendering(html: str) -> bool:
+    """Heuristic: does this raw HTML look like it needs JavaScript to show its links?"""
+    anchors = 0
+    for _ in ANCHOR_PATTERN.finditer(html):
+        anchors += 1
+        if anchors >= MIN_STATIC_ANCHORS:
+            break
+    else:
+        return True
+    lowered = html.lower()
+    return any(marker in lowered for marker in JS_SHELL_MARKERS)
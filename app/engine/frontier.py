@@ -0,0 +1,27 @@
+from hashlib import blake2b
+
+
+def _digest(key: str, size: int) -> bytes:
+    return blake2b(key.encode("utf-8", "surrogatepass"), digest_size=size).digest()
+
+
+class SeenSet:
+    """Set of URL keys stored as 64-bit BLAKE2b digests.
+
+    Each entry costs a small int instead of the full URL string, a few times
+    less memory on long crawls. With 64-bit digests a collision is not
+    expected before billions of entries.
+    """
+
+    def __init__(self):
+        self._digests: set[int] = set()
+
+    def add(self, key: str):
+        self._digests.add(int.from_bytes(_digest(key, 8), "little"))
+
+    def __contains__(self, key: str) -> bool:
+        return int.from_bytes(_digest(key, 8), "little") in self._digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
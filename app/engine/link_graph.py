@@ -0,0 +1,130 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from typing import Dict, List, Optional, Set, Tuple
+
+from config.urls import url_key
+
+logger = logging.getLogger(__name__)
+
+LINK_GRAPH_PATH = os.getenv("LINK_GRAPH_PATH", os.path.join(".cache", "link_graph.sqlite3"))
+
+
+def content_hash(html: str) -> str:
+    return blake2b(html.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+@dataclass
+class CrawledPage:
+    url: str
+    content_hash: str
+    links: Optional[Set[str]] = None  # None when the page was unchanged and its stored links still apply
+    depth: int = 0  # Crawl level the page was fetched at, 0 for the start page
+
+
+@dataclass
+class SiteGraph:
+    """What the last crawl from one start page found, as loaded from a ``LinkGraph``."""
+    urls: Dict[str, str] = field(default_factory=dict)  # Node key -> URL
+    categories: Dict[str, str] = field(default_factory=dict)  # Node key -> category, for classified URLs only
+    hashes: Dict[str, str] = field(default_factory=dict)  # Crawled page key -> content hash at the last fetch
+    edges: Dict[str, List[str]] = field(default_factory=dict)  # Crawled page key -> keys of the nodes it links to
+    depths: Dict[str, int] = field(default_factory=dict)  # Crawled page key -> crawl level it was fetched at
+
+    def crawled_pages(self) -> List[Tuple[str, int]]:
+        """``(url, depth)`` of every page the last crawl fetched."""
+        return [(self.urls[key], self.depths.get(key, 0)) for key in self.hashes if key in self.urls]
+
+    def links_from(self, key: str) -> Set[str]:
+        return {self.urls[target] for target in self.edges.get(key, ()) if target in self.urls}
+
+
+class LinkGraph:
+    """SQLite store of each crawl's link graph, keyed by the crawl's start page.
+
+    Nodes are every URL a crawl found, with its category and first/last-seen
+    times; crawled pages also keep a content hash. Edges record which URLs
+    each crawled page links to, so an unchanged page never has to be parsed
+    again. Saving a crawl drops the nodes it no longer reached.
+    """
+
+    def __init__(self, path: str = LINK_GRAPH_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS nodes ("
+                " root TEXT, key TEXT, url TEXT, category TEXT, content_hash TEXT,"
+                " first_seen REAL, last_seen REAL, last_crawled REAL, depth INTEGER, PRIMARY KEY (root, key))"
+            )
+            if "depth" not in {row[1] for row in conn.execute("PRAGMA table_info(nodes)")}:
+                conn.execute("ALTER TABLE nodes ADD COLUMN depth INTEGER")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS edges (root TEXT, source TEXT, target TEXT, PRIMARY KEY (root, source, target))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def load(self, root: str) -> SiteGraph:
+        graph = SiteGraph()
+        with self._lock:
+            conn = self._connect()
+            for key, url, category, digest, depth in conn.execute(
+                "SELECT key, url, category, content_hash, depth FROM nodes WHERE root = ?", (url_key(root),)
+            ):
+                graph.urls[key] = url
+                if category is not None:
+                    graph.categories[key] = category
+                if digest is not None:
+                    graph.hashes[key] = digest
+                    graph.depths[key] = depth or 0
+            for source, target in conn.execute("SELECT source, target FROM edges WHERE root = ?", (url_key(root),)):
+                graph.edges.setdefault(source, []).append(target)
+        return graph
+
+    def save(self, root: str, nodes: Dict[str, Tuple[str, Optional[str]]], crawled: Dict[str, CrawledPage]):
+        """Replace the graph for ``root`` with ``nodes`` (key -> (URL, category)) and the ``crawled`` pages."""
+        root = url_key(root)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            existing = {key for key, in conn.execute("SELECT key FROM nodes WHERE root = ?", (root,))}
+            gone = [(root, key) for key in existing - nodes.keys()]
+            conn.executemany("DELETE FROM nodes WHERE root = ? AND key = ?", gone)
+            conn.executemany("DELETE FROM edges WHERE root = ? AND source = ?", gone)
+            conn.executemany(
+                "INSERT INTO nodes (root, key, url, category, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (root, key) DO UPDATE SET"
+                " url = excluded.url, category = excluded.category, last_seen = excluded.last_seen",
+                [(root, key, url, category, now, now) for key, (url, category) in nodes.items()],
+            )
+            for key, page in crawled.items():
+                conn.execute(
+                    "UPDATE nodes SET content_hash = ?, last_crawled = ?, depth = ? WHERE root = ? AND key = ?",
+                    (page.content_hash, now, page.depth, root, key),
+                )
+                if page.links is not None:
+                    conn.execute("DELETE FROM edges WHERE root = ? AND source = ?", (root, key))
+                    conn.executemany("INSERT OR IGNORE INTO edges VALUES (?, ?, ?)",
+                                     [(root, key, url_key(link)) for link in page.links])
+            conn.commit()
+        logger.info(f"Saved link graph for {root}: {len(nodes)} node(s), {len(gone)} removed")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+link_graph = LinkGraph()
@@ -0,0 +1,60 @@
+from typing import Optional, Set
+from urllib.parse import urljoin
+
+from lxml import etree
+
+LINK_SCHEMES = ("http://", "https://")
+
+
+class _LinkCollector:
+    """lxml parser target that records ``<base href>`` and ``<a href>`` values.
+
+    Using a target means lxml only calls back on start tags; no element tree
+    is built and text nodes are never materialized.
+    """
+
+    def __init__(self):
+        self.base: Optional[str] = None
+        self.hrefs: list[str] = []
+
+    def start(self, tag, attrib):
+        if tag == "a":
+            href = attrib.get("href")
+            if href:
+                self.hrefs.append(href)
+        elif tag == "base" and self.base is None:
+            self.base = attrib.get("href")
+
+    def close(self):
+        return self
+
+
+def extract_links(html: str, page_url: str) -> Set[str]:
+    """Return the absolute http(s) URLs of every ``<a href>`` in ``html``.
+
+    Relative links are resolved against the document's ``<base href>`` when it
+    has one, otherwise against ``page_url``. Malformed hrefs, such as an
+    unclosed IPv6 bracket, are skipped.
+    """
+    if not html:
+        return set()
+    collector = _LinkCollector()
+    parser = etree.HTMLParser(target=collector)
+    parser.feed(html)
+    parser.close()
+
+    base_url = page_url
+    if collector.base:
+        try:
+            base_url = urljoin(page_url, collector.base.strip())
+        except ValueError:
+            pass  # Resolve against the page itself, as a browser would
+    links = set()
+    for href in collector.hrefs:
+        try:
+            link = urljoin(base_url, href.strip())
+        except ValueError:
+            continue
+        if link.startswith(LINK_SCHEMES):
+            links.add(link)
+    return links
@@ -0,0 +1,43 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from config.urls import url_key
+
+
+@dataclass
+class ExploredPage:
+    url: str
+    source: str  # "http" or "browser"
+    content_hash: str
+    links: Set[str]  # Normalized links on the page
+
+
+class PageCache:
+    """Pages explored by several concurrent crawls, so each is fetched once.
+
+    Crawls of overlapping sites in one batch share it: a crawl that reaches
+    a page another crawl has explored gets that page's links, and one that
+    reaches a page still being fetched waits for that fetch. Only the links
+    and content hash are kept, not the HTML. ``close()`` cancels fetches
+    nobody is waiting for any more.
+    """
+
+    def __init__(self):
+        self._pages: Dict[str, asyncio.Future] = {}
+
+    async def get(self, url: str, explore: Callable[[], Awaitable[Optional[ExploredPage]]]) -> Optional[ExploredPage]:
+        """The explored page for ``url``, calling ``explore()`` unless another crawl already has."""
+        key = url_key(url)
+        future = self._pages.get(key)
+        if future is None:
+            future = self._pages[key] = asyncio.ensure_future(explore())
+        # One crawl giving up must not cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def close(self):
+        for future in self._pages.values():
+            future.cancel()
@@ -0,0 +1,228 @@
+import csv
+import io
+import logging
+import os
+import tempfile
+import zlib
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+GZIP = "gzip"
+ZSTD = "zstd"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "1000"))  # Rows buffered per Parquet write
+
+# Columns of each export; anything not listed in COLUMN_TYPES is a string
+LINK_COLUMNS = ("url", "type", "category")  # type is "page", "tag", "category" or empty
+CONTENT_COLUMNS = ("url", "status", "bytes", "content", "title", "description",
+                   "truncated", "skipped", "short_circuited", "attempts")  # See config.models.ScrapeResult
+CATEGORY_CONTENT_COLUMNS = ("category",) + CONTENT_COLUMNS
+COLUMN_TYPES = {"status": "Int64", "bytes": "Int64", "truncated": "boolean", "short_circuited": "boolean",
+                "attempts": "Int64"}
+
+MEDIA_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv",
+               "parquet": "application/vnd.apache.parquet"}
+COMPRESSED_MEDIA_TYPES = {GZIP: "application/gzip", ZSTD: "application/zstd"}
+COMPRESSED_SUFFIXES = {GZIP: ".gz", ZSTD: ".zst"}
+
+
+class ExportUnavailableError(Exception):
+    """The requested format or compression needs a package that is not installed."""
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ExportUnavailableError("zstd compression needs the zstandard package") from None
+    return zstandard
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportUnavailableError("Parquet exports need the pyarrow package") from None
+    return pyarrow
+
+
+def check_available(fmt: str, compression: Optional[str] = None):
+    """Raise ``ExportUnavailableError`` before any work is done if an export cannot be written."""
+    if fmt == "parquet":
+        _pyarrow()
+    elif compression == ZSTD:
+        _zstandard()
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick zstd or gzip from an ``Accept-Encoding`` header, preferring zstd at equal weight."""
+    weights = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        if params.strip().startswith("q="):
+            try:
+                weight = float(params.strip()[2:])
+            except ValueError:
+                continue
+        weights[name.strip()] = weight
+    candidates = [GZIP]
+    try:
+        _zstandard()
+        candidates.insert(0, ZSTD)
+    except ExportUnavailableError:
+        pass
+    best = max(candidates, key=lambda name: weights.get(name, 0), default=None)
+    return best if weights.get(best, 0) > 0 else None
+
+
+class Compressor:
+    """Incremental gzip or zstd compressor. ``flush()`` makes everything written so far decodable."""
+
+    def __init__(self, encoding: str):
+        if encoding == ZSTD:
+            zstandard = _zstandard()
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(self._flush_mode)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+async def encode_stream(chunks: AsyncIterator[bytes], encoding: Optional[str]) -> AsyncIterator[bytes]:
+    """Compress a streaming response chunk by chunk, flushing so each record reaches the client at once."""
+    if encoding is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+    compressor = Compressor(encoding)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+def encode_chunks(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Synchronous ``encode_stream``, for responses generated in a worker thread."""
+    if encoding is None:
+        yield from chunks
+        return
+    compressor = Compressor(encoding)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+def encoding_headers(encoding: Optional[str]) -> Dict[str, str]:
+    return {"Content-Encoding": encoding, "Vary": "Accept-Encoding"} if encoding else {"Vary": "Accept-Encoding"}
+
+
+class ExportWriter:
+    """Writes export records to a temporary file one at a time.
+
+    ``fmt`` is "ndjson" (compact orjson), "csv", "parquet" or "json", which
+    takes one whole document from ``write_document()``. All but Parquet
+    are compressed while they are written: with ``compression`` the download
+    is a .gz/.zst file, with ``content_encoding`` (from ``negotiate_encoding``)
+    it is sent with a Content-Encoding header and decoded by the client.
+    Parquet files compress their column chunks with ``compression``, or
+    snappy, and are written one row group at a time.
+    """
+
+    def __init__(self, fmt: str, columns: Sequence[str], name: str, compression: Optional[str] = None,
+                 content_encoding: Optional[str] = None):
+        self.fmt = fmt
+        self.columns = tuple(columns)
+        self.compression = compression
+        self.content_encoding = None if fmt == "parquet" or compression else content_encoding
+        self.filename = f"{name}.{fmt}" + (COMPRESSED_SUFFIXES[compression] if compression and fmt != "parquet" else "")
+        self.rows = 0
+        fd, self.path = tempfile.mkstemp(prefix=f"{name}-", suffix=f".{fmt}")
+        self._file = os.fdopen(fd, "wb")
+        encoding = None if fmt == "parquet" else compression or self.content_encoding
+        self._compressor = Compressor(encoding) if encoding else None
+        self._text = io.StringIO()
+        self._csv = csv.writer(self._text)
+        self._batch: List[dict] = []
+        self._parquet = None
+        if fmt == "csv":
+            self._write_csv_row(self.columns)
+
+    @property
+    def media_type(self) -> str:
+        if self.compression and self.fmt != "parquet":
+            return COMPRESSED_MEDIA_TYPES[self.compression]
+        return MEDIA_TYPES[self.fmt]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return encoding_headers(self.content_encoding)
+
+    def write_document(self, data):
+        """Write a "json" export in one go, serialized compactly with orjson."""
+        self._write_bytes(orjson.dumps(data))
+
+    def write(self, record: dict):
+        self.rows += 1
+        if self.fmt == "ndjson":
+            self._write_bytes(orjson.dumps(record) + b"\n")
+        elif self.fmt == "csv":
+            self._write_csv_row([record.get(column) for column in self.columns])
+        else:
+            self._batch.append(record)
+            if len(self._batch) >= PARQUET_ROW_GROUP_SIZE:
+                self._write_row_group()
+
+    def close(self) -> str:
+        """Finish the file and return its path."""
+        if self.fmt == "parquet":
+            if self._batch or self._parquet is None:
+                self._write_row_group()
+            self._parquet.close()
+        elif self._compressor is not None:
+            self._file.write(self._compressor.finish())
+        self._file.close()
+        logger.info(f"Exported {self.rows} row(s) to {self.filename}")
+        return self.path
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _write_bytes(self, data: bytes):
+        self._file.write(self._compressor.compress(data) if self._compressor is not None else data)
+
+    def _write_csv_row(self, values):
+        self._csv.writerow(values)
+        self._write_bytes(self._text.getvalue().encode("utf-8"))
+        self._text.seek(0)
+        self._text.truncate()
+
+    def _write_row_group(self):
+        import pandas as pd
+
+        pyarrow = _pyarrow()
+        frame = pd.DataFrame(self._batch, columns=list(self.columns))
+        frame = frame.astype({column: COLUMN_TYPES.get(column, "string") for column in self.columns})
+        table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pyarrow.parquet.ParquetWriter(self._file, table.schema,
+                                                          compression=self.compression or "snappy")
+        self._parquet.write_table(table)
+        self._batch.clear()
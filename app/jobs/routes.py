@@ -0,0 +1,64 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from config.models import JobResponse, URLListRequest, URLRequest
+from export import encode_chunks, encoding_headers, negotiate_encoding
+
+from .store import FINISHED_STATES
+from .worker import job_runner
+
+router = APIRouter()
+
+
+def job_response(job: dict) -> JobResponse:
+    return JobResponse(job_id=job["id"], **{key: value for key, value in job.items() if key != "id"})
+
+
+async def get_job_or_404(job_id: str) -> dict:
+    job = await asyncio.to_thread(job_runner.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@router.post("/analyze", response_model=JobResponse, status_code=202)
+async def submit_analyze_job(request: URLRequest):
+    """Queue an /analyze crawl and return its job id immediately."""
+    job_id = await job_runner.submit("analyze", request.model_dump())
+    return job_response(await get_job_or_404(job_id))
+
+
+@router.post("/scrape", response_model=JobResponse, status_code=202)
+async def submit_scrape_job(request: URLListRequest):
+    """Queue a /scrape-all-urls/ batch and return its job id immediately."""
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="No URLs provided in the request.")
+    job_id = await job_runner.submit("scrape", request.model_dump(), total=len(request.urls))
+    return job_response(await get_job_or_404(job_id))
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    return job_response(await get_job_or_404(job_id))
+
+
+@router.get("/{job_id}/results")
+async def get_job_results(job_id: str, http_request: Request):
+    """Download a finished job's results as newline-delimited JSON, gzip or zstd encoded if the client accepts it."""
+    job = await get_job_or_404(job_id)
+    if job["status"] not in FINISHED_STATES:
+        raise HTTPException(status_code=409, detail=f"Job is still {job['status']}.")
+    encoding = negotiate_encoding(http_request.headers.get("accept-encoding"))
+    records = ((record + "\n").encode("utf-8") for record in job_runner.store.iter_results(job_id))
+    return StreamingResponse(encode_chunks(records, encoding), media_type="application/x-ndjson",
+                             headers=encoding_headers(encoding))
+
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    await get_job_or_404(job_id)
+    if not await job_runner.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job has already finished.")
+    return job_response(await get_job_or_404(job_id))
@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Iterator, List, Optional, Sequence
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join("data", "jobs.sqlite3"))
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+UNFINISHED_STATES = (QUEUED, RUNNING)
+
+
+class JobStore:
+    """SQLite-backed store for crawl jobs and their result records.
+
+    Results are kept as JSON records in insertion order so a finished job can be
+    downloaded any number of times without crawling again.
+    """
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, kind TEXT, payload TEXT, status TEXT,"
+                " total INTEGER, done INTEGER DEFAULT 0, failed INTEGER DEFAULT 0, error TEXT,"
+                " created_at REAL, started_at REAL, finished_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " job_id TEXT, seq INTEGER, record TEXT, PRIMARY KEY (job_id, seq))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def create(self, kind: str, payload: dict, total: Optional[int] = None) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, total, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, total, time.time()),
+            )
+            conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None,
+                   only_from: Sequence[str] = ()) -> bool:
+        """Move a job to ``status``; with ``only_from``, only if it is in one of those states.
+
+        Returns whether the job was updated, so callers racing on one job can
+        tell which of them won.
+        """
+        now = time.time()
+        condition, params = "id = ?", [job_id]
+        if only_from:
+            condition += f" AND status IN ({', '.join('?' for _ in only_from)})"
+            params += list(only_from)
+        with self._lock:
+            conn = self._connect()
+            if status == RUNNING:
+                cursor = conn.execute(f"UPDATE jobs SET status = ?, started_at = ? WHERE {condition}",
+                                      [status, now] + params)
+            elif status in FINISHED_STATES:
+                cursor = conn.execute(f"UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE {condition}",
+                                      [status, error, now] + params)
+            else:
+                cursor = conn.execute(f"UPDATE jobs SET status = ? WHERE {condition}", [status] + params)
+            conn.commit()
+        return cursor.rowcount > 0
+
+    def update_progress(self, job_id: str, done: int, failed: int = 0, total: Optional[int] = None):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE jobs SET done = ?, failed = ?, total = COALESCE(?, total) WHERE id = ?",
+                (done, failed, total, job_id),
+            )
+            conn.commit()
+
+    def add_results(self, job_id: str, records: List[dict]):
+        """Append result records, continuing the job's sequence numbers."""
+        if not records:
+            return
+        with self._lock:
+            conn = self._connect()
+            start = conn.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM results WHERE job_id = ?", (job_id,)).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO results (job_id, seq, record) VALUES (?, ?, ?)",
+                [(job_id, start + i, json.dumps(record)) for i, record in enumerate(records)],
+            )
+            conn.commit()
+
+    def clear_results(self, job_id: str):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+            conn.commit()
+
+    def iter_results(self, job_id: str, batch_size: int = 100) -> Iterator[str]:
+        """Yield stored records as JSON strings, a batch at a time."""
+        seq = -1
+        while True:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT seq, record FROM results WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (job_id, seq, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row["record"]
+            seq = rows[-1]["seq"]
+
+    def unfinished(self) -> List[str]:
+        """Ids of jobs that were queued or running, oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", UNFINISHED_STATES
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
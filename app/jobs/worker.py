@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+from config.models import URLListRequest, URLRequest
+from engine.fetch import FetchOptions
+from scraper import analyze_site, iter_scrape_results
+
+from .store import CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, UNFINISHED_STATES, JobStore
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Jobs run at once
+RESULT_BATCH_SIZE = 20  # Scrape results written to the store per transaction
+PROGRESS_INTERVAL = 1.0  # Seconds between progress writes of a running analyze job
+
+
+async def run_analyze_job(store: JobStore, job: dict):
+    request = URLRequest(**job["payload"])
+    fetched = reported = 0
+
+    def on_page():
+        nonlocal fetched
+        fetched += 1
+
+    async def report():
+        # Pages are counted as they are fetched and written at most once per interval
+        nonlocal reported
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            if fetched != reported:
+                reported = fetched
+                await asyncio.to_thread(store.update_progress, job["id"], reported)
+
+    reporter = asyncio.create_task(report())
+    try:
+        result = await analyze_site(request.url, FetchOptions.from_request(request),
+                                    max_depth=request.max_depth, max_pages=request.max_pages,
+                                    discover=request.discover, incremental=request.incremental, on_page=on_page)
+    finally:
+        reporter.cancel()
+    pages = len(result["sources"])
+    await asyncio.to_thread(store.add_results, job["id"], [result])
+    await asyncio.to_thread(store.update_progress, job["id"], pages, 0, pages)
+
+
+async def run_scrape_job(store: JobStore, job: dict):
+    request = URLListRequest(**job["payload"])
+    done = failed = 0
+    batch = []
+
+    async def flush():
+        await asyncio.to_thread(store.add_results, job["id"], batch)
+        await asyncio.to_thread(store.update_progress, job["id"], done, failed)
+        batch.clear()
+
+    async for result in iter_scrape_results(request.urls, FetchOptions.from_request(request)):
+        done += 1
+        if result.status != 200:
+            failed += 1
+        batch.append(result.model_dump())
+        if len(batch) >= RESULT_BATCH_SIZE:
+            await flush()
+    await flush()
+
+
+JOB_HANDLERS = {
+    "analyze": run_analyze_job,
+    "scrape": run_scrape_job,
+}
+
+
+class JobRunner:
+    """Runs queued jobs on a fixed number of background workers.
+
+    Jobs left queued or running by a previous process are restarted from
+    scratch on ``start()``.
+    """
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS):
+        self.store = store
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        for job_id in await asyncio.to_thread(self.store.unfinished):
+            await asyncio.to_thread(self.store.clear_results, job_id)
+            await asyncio.to_thread(self.store.set_status, job_id, QUEUED)
+            self._queue.put_nowait(job_id)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logger.info(f"Started {self.workers} job worker(s), {self._queue.qsize()} job(s) resumed")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.store.close()
+
+    async def submit(self, kind: str, payload: dict, total: Optional[int] = None) -> str:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = await asyncio.to_thread(self.store.create, kind, payload, total)
+        self._queue.put_nowait(job_id)
+        logger.info(f"Queued {kind} job {job_id}")
+        return job_id
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it had already finished."""
+        # Conditional, so a job that finishes at the same moment keeps its own outcome
+        if not await asyncio.to_thread(self.store.set_status, job_id, CANCELLED, None, UNFINISHED_STATES):
+            return False
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        logger.info(f"Cancelled job {job_id}")
+        return True
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job["status"] != QUEUED:
+                continue  # Cancelled while waiting in the queue
+            task = asyncio.create_task(self._run(job))
+            self._running[job_id] = task
+            try:
+                # wait() does not re-raise the job's own cancellation into the worker
+                await asyncio.wait([task])
+            except asyncio.CancelledError:
+                # Shutting down: leave the job marked running so the next start resumes it
+                task.cancel()
+                raise
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _run(self, job: dict):
+        # A job cancelled since the worker read it matches no row and is skipped
+        if not await asyncio.to_thread(self.store.set_status, job["id"], RUNNING, None, (QUEUED,)):
+            logger.info(f"Skipped job {job['id']}, cancelled before it started")
+            return
+        try:
+            await JOB_HANDLERS[job["kind"]](self.store, job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {e}")
+            await asyncio.to_thread(self.store.set_status, job["id"], FAILED, str(e), (RUNNING,))
+            return
+        if await asyncio.to_thread(self.store.set_status, job["id"], COMPLETED, None, (RUNNING,)):
+            logger.info(f"Completed {job['kind']} job {job['id']}")
+
+
+job_runner = JobRunner(JobStore())
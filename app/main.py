@@ -1,18 +1,32 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from config.models import URLRequest, URLResponse, URLListRequest
-from scraper import fetch_links, write_links_to_csv, extract_unique_categories, extract_unique_pages, extract_unique_tags
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from config.models import BatchAnalyzeRequest, URLRequest, URLResponse, URLListRequest, ScrapeResult
+from config.driver_pool import driver_pool, browser_executor, close_driver_pools
+from config.http_client import start_session, close_session
+from config.http_cache import http_cache
+from config.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry, timed
+from engine.extract import shutdown_executor
+from engine.fetch import FetchOptions
+from engine.frontier import SeenSet
+from engine.link_graph import link_graph
+from export import (CATEGORY_CONTENT_COLUMNS, CONTENT_COLUMNS, LINK_COLUMNS, ExportUnavailableError, ExportWriter,
+                    check_available, encode_stream, encoding_headers, negotiate_encoding)
+from scraper import (fetch_links, link_records, analyze_site, iter_batch_analysis, scrape_single_url,
+                     iter_scrape_results)
+from typing import Optional
 import logging
 import sys
 import os
-import json
 import asyncio
-import aiohttp
-from aiohttp import ClientError, ClientTimeout
+import orjson
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from packages.pdfextract.routes import router as pdf_router
+from packages.pdfextract.cache import pdf_cache
+from packages.pdfextract.services import shutdown_executor as shutdown_pdf_executor
+from jobs.routes import router as jobs_router
+from jobs.worker import job_runner
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +35,9 @@ logger = logging.getLogger(__name__)
 app = FastAPI()
 
 app.include_router(pdf_router, prefix="/pdfextract", tags=["PDF Extraction"])
+app.include_router(jobs_router, prefix="/jobs", tags=["Crawl Jobs"])
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 
 # Configure CORS
@@ -32,47 +49,89 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Define constants
-TIMEOUT = 10  # Timeout for each URL request in seconds
+@app.on_event("startup")
+async def warm_up_driver_pool():
+    """Start a few browsers before the first crawl request arrives."""
+    await asyncio.get_running_loop().run_in_executor(browser_executor, driver_pool.warm_up)
+
+@app.on_event("shutdown")
+async def close_driver_pool():
+    browser_executor.shutdown(wait=False, cancel_futures=True)
+    close_driver_pools()
+
+@app.on_event("startup")
+async def open_http_session():
+    await start_session()
+
+@app.on_event("startup")
+async def start_job_runner():
+    await job_runner.start()
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    await job_runner.stop()
+
+@app.on_event("shutdown")
+async def close_http_session():
+    await close_session()
+    http_cache.close()
+    link_graph.close()
+
+@app.on_event("shutdown")
+async def stop_extraction_pools():
+    shutdown_executor()
+    shutdown_pdf_executor()
+    pdf_cache.close()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Stage timings and fetch counters in the Prometheus text format."""
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
 
 @app.post("/scrape-unique-links-in-categories/", response_model=dict)
-async def scrape_unique_links_in_categories(request: URLListRequest, background_tasks: BackgroundTasks):
+async def scrape_unique_links_in_categories(request: URLListRequest, background_tasks: BackgroundTasks,
+                                            http_request: Request):
     """
     Fetch all URLs from each category page and then scrape their contents concurrently.
+    Downloads are JSON unless `format` asks for NDJSON, CSV or Parquet rows.
     """
+    encoding = negotiate_encoding(http_request.headers.get("accept-encoding"))
+    fmt = export_format(request, "json")
+    writer = None
     try:
         if not request.urls:
             raise ValueError("No category URLs provided in the request.")
         logger.info(f"Scraping the following categories: {request.urls}")
+        options = FetchOptions.from_request(request)
 
-        categories_with_links = {}
-        for category_url in request.urls:
-            logger.info(f"Fetching links from category URL: {category_url}")
-            
-            # Fetch all links within the category page only once
-            category_links = await fetch_links(category_url, set())
-            logger.info(f"Found {len(category_links)} links in {category_url}")
+        if request.stream:
+            return StreamingResponse(encode_stream(stream_category_results(request.urls, options), encoding),
+                                     media_type=NDJSON_MEDIA_TYPE, headers=encoding_headers(encoding))
 
-            # Enumerate the links found
-            urls_to_scrape = [link['link'] for link in category_links if isinstance(link, dict) and 'link' in link]
-            logger.info(f"URLs to scrape from {category_url}: {urls_to_scrape}")
+        if fmt != "json":
+            writer = ExportWriter(fmt, CATEGORY_CONTENT_COLUMNS, "output", request.compression, encoding)
+            for category_url in request.urls:
+                urls_to_scrape = await fetch_category_links(category_url, options)
+                async for result in iter_scrape_results(urls_to_scrape, options):
+                    writer.write(content_record(result, category_url))
+            return export_response(writer, background_tasks)
 
-            if not urls_to_scrape:
-                logger.warning(f"No URLs found to scrape for category: {category_url}")
+        categories_with_links = {}
+        for category_url in request.urls:
+            urls_to_scrape = await fetch_category_links(category_url, options)
 
             # Scrape contents of all URLs found within the category concurrently
             scraped_contents = await asyncio.gather(
-                *[scrape_single_url(url) for url in urls_to_scrape],
+                *[scrape_single_url(url, options) for url in urls_to_scrape],
                 return_exceptions=True  # Capture errors individually
             )
 
             # Store results in the dictionary
             categories_with_links[category_url] = {}
             for result in scraped_contents:
-                if isinstance(result, tuple) and len(result) == 2:
-                    url, content = result
-                    categories_with_links[category_url][url] = content
-                    logger.info(f"Scraped content from {url}")
+                if isinstance(result, ScrapeResult):
+                    categories_with_links[category_url][result.url] = result_content(result)
+                    logger.debug("Scraped content from %s", result.url)
                 elif isinstance(result, Exception):
                     logger.error(f"Error scraping URL: {result}")
 
@@ -80,130 +139,206 @@ async def scrape_unique_links_in_categories(request: URLListRequest, background_
         if not categories_with_links:
             raise ValueError("No content could be scraped from the provided URLs.")
 
-        # Save the scraped contents into a JSON file
-        json_file_path = "output.json"
-        with open(json_file_path, "w") as json_file:
-            json.dump(categories_with_links, json_file, indent=4)
-
-        # Clean up the JSON file after the response
-        background_tasks.add_task(clean_up_file, json_file_path)
-        return FileResponse(
-            path=json_file_path, filename="output.json", media_type="application/json"
-        )
+        # Save the scraped contents into a JSON file, cleaned up after the response
+        writer = ExportWriter("json", (), "output", request.compression, encoding)
+        writer.write_document(categories_with_links)
+        return export_response(writer, background_tasks)
     except Exception as e:
         logger.error(f"Error scraping unique links in categories: {e}")
+        if writer is not None:
+            writer.discard()
         raise HTTPException(status_code=500, detail="Failed to scrape unique links in categories.")
 
+async def fetch_category_links(category_url: str, options: FetchOptions) -> list[str]:
+    """Fetch all links within a category page only once."""
+    logger.info(f"Fetching links from category URL: {category_url}")
+    category_links = await fetch_links(category_url, SeenSet(), options=options)
+    logger.info(f"Found {len(category_links)} links in {category_url}")
+
+    # Enumerate the links found
+    urls_to_scrape = [link for link in category_links if isinstance(link, str)]
+    logger.debug("URLs to scrape from %s: %s", category_url, urls_to_scrape)
+
+    if not urls_to_scrape:
+        logger.warning(f"No URLs found to scrape for category: {category_url}")
+    return urls_to_scrape
+
+async def stream_category_results(category_urls: list[str], options: FetchOptions):
+    """Yield one NDJSON record per scraped URL, tagged with the category it came from."""
+    for category_url in category_urls:
+        urls_to_scrape = await fetch_category_links(category_url, options)
+        async for result in iter_scrape_results(urls_to_scrape, options):
+            with timed("serialize"):
+                record = orjson.dumps({"category": category_url, **result.model_dump()}) + b"\n"
+            yield record
+
 @app.post("/analyze", response_model=URLResponse)
 async def analyze_url(request: URLRequest):
     try:
-        visited_links = set()
-        all_links = await fetch_links(request.url, visited_links)
-
-        pages = extract_unique_pages(all_links)
-        tags = extract_unique_tags(all_links)
-        categories = extract_unique_categories(all_links)
-
-        response_urls = []
-        for page in pages:
-            response_urls.append({"category": "Page", "url": page['link']})
-        for tag in tags:
-            response_urls.append({"category": tag['category'], "url": tag['link']})
-        for category in categories:
-            response_urls.append({"category": category['category'], "url": category['link']})
-
-        logger.info(f"Prepared response: {response_urls}")
-        return {"urls": response_urls}
+        return await analyze_site(request.url, FetchOptions.from_request(request),
+                                  max_depth=request.max_depth, max_pages=request.max_pages,
+                                  discover=request.discover, incremental=request.incremental)
     except Exception as e:
         logger.error(f"Error in /analyze: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze/batch")
+async def analyze_batch(request: BatchAnalyzeRequest, http_request: Request):
+    """
+    Analyze many sites under one shared page budget and fetch concurrency, streaming
+    one NDJSON record per site (its /analyze response, or an error) as each finishes.
+    """
+    logger.info(f"Analyzing {len(request.urls)} site(s) in one batch")
+    results = iter_batch_analysis(request.urls, FetchOptions.from_request(request), max_depth=request.max_depth,
+                                  max_pages=request.max_pages, total_pages=request.total_pages,
+                                  concurrency=request.concurrency, discover=request.discover,
+                                  incremental=request.incremental)
+    encoding = negotiate_encoding(http_request.headers.get("accept-encoding"))
+    return StreamingResponse(encode_stream(stream_batch_results(results), encoding), media_type=NDJSON_MEDIA_TYPE,
+                             headers=encoding_headers(encoding))
+
+async def stream_batch_results(results):
+    """Yield one NDJSON record per analyzed site."""
+    async for url, result in results:
+        if isinstance(result, Exception):
+            record = {"url": url, "error": str(result)}
+        else:
+            record = {"url": url, **URLResponse(**result).model_dump()}
+        with timed("serialize"):
+            line = orjson.dumps(record) + b"\n"
+        yield line
+
 @app.post("/scrape-links/")
-async def scrape_links(request: URLListRequest, background_tasks: BackgroundTasks):
+async def scrape_links(request: URLListRequest, background_tasks: BackgroundTasks, http_request: Request):
     """
     Fetch and scrape links based on the provided list of URLs.
+    Each link is exported with its type (page, tag or category) and category name, as CSV by default.
     """
+    encoding = negotiate_encoding(http_request.headers.get("accept-encoding"))
+    fmt = export_format(request, "csv")
+    writer = None
     try:
         urls = request.urls
-        visited_links = set()
+        visited_links = SeenSet()
         logger.info(f"Scraping the following URLs: {urls}")
 
+        options = FetchOptions.from_request(request)
         all_links = []
         for url in urls:
-            links = await fetch_links(url, visited_links)
+            links = await fetch_links(url, visited_links, options=options)
             all_links.extend(links)
 
-        csv_file_path = await write_links_to_csv(all_links)
-        background_tasks.add_task(clean_up_file, csv_file_path)
-        return FileResponse(path=csv_file_path, filename="unique_links.csv", media_type="text/csv")
+        writer = ExportWriter(fmt, LINK_COLUMNS, "unique_links", request.compression, encoding)
+        if fmt == "json":
+            writer.write_document(list(link_records(all_links)))
+        else:
+            for record in link_records(all_links):
+                writer.write(record)
+        return export_response(writer, background_tasks)
     except Exception as e:
         logger.error(f"Error scraping links: {str(e)}")
+        if writer is not None:
+            writer.discard()
         raise HTTPException(status_code=500, detail=f"Error scraping links: {str(e)}")
 
 @app.post("/scrape-all-urls/")
-async def scrape_all_urls(request: URLListRequest, background_tasks: BackgroundTasks):
+async def scrape_all_urls(request: URLListRequest, background_tasks: BackgroundTasks, http_request: Request):
     """
-    Scrape the contents of multiple URLs concurrently and save them into a JSON file.
+    Scrape the contents of multiple URLs concurrently and save them into a JSON file,
+    or stream them back as newline-delimited JSON when `stream` is set. With `format`
+    set to NDJSON, CSV or Parquet, each result is written as it arrives.
     """
+    encoding = negotiate_encoding(http_request.headers.get("accept-encoding"))
+    fmt = export_format(request, "json")
+    writer = None
     try:
         if not request.urls:
             raise ValueError("No URLs provided in the request.")
         logger.info(f"Starting to scrape the following URLs: {request.urls}")
+        options = FetchOptions.from_request(request)
+
+        if request.stream:
+            return StreamingResponse(encode_stream(stream_scrape_results(request.urls, options), encoding),
+                                     media_type=NDJSON_MEDIA_TYPE, headers=encoding_headers(encoding))
+
+        if fmt != "json":
+            writer = ExportWriter(fmt, CONTENT_COLUMNS, "output", request.compression, encoding)
+            async for result in iter_scrape_results(request.urls, options):
+                writer.write(content_record(result))
+            return export_response(writer, background_tasks)
 
         results = await asyncio.gather(
-            *[scrape_single_url(url) for url in request.urls],
+            *[scrape_single_url(url, options) for url in request.urls],
             return_exceptions=True
         )
 
         url_contents = {}
         for result in results:
-            if isinstance(result, tuple) and len(result) == 2:
-                url, content = result
-                url_contents[url] = content
+            if isinstance(result, ScrapeResult):
+                url_contents[result.url] = result_content(result)
             elif isinstance(result, Exception):
                 logger.error(f"Error during scraping: {result}")
 
         if not url_contents:
             raise ValueError("No content could be scraped from the provided URLs.")
 
-        json_file_path = "output.json"
-        with open(json_file_path, "w") as json_file:
-            json.dump(url_contents, json_file, indent=4)
-
-        background_tasks.add_task(clean_up_file, json_file_path)
-        return FileResponse(
-            path=json_file_path, filename="output.json", media_type="application/json"
-        )
+        writer = ExportWriter("json", (), "output", request.compression, encoding)
+        writer.write_document(url_contents)
+        return export_response(writer, background_tasks)
     except Exception as e:
         logger.error(f"Error scraping URLs: {e}")
+        if writer is not None:
+            writer.discard()
         raise HTTPException(status_code=500, detail="Failed to scrape URLs. Please try again.")
 
-async def scrape_single_url(url):
-    """
-    Scrape a single URL's content using aiohttp.
+async def stream_scrape_results(urls: list[str], options: FetchOptions):
+    """Yield one NDJSON record per URL as soon as it has been scraped."""
+    async for result in iter_scrape_results(urls, options):
+        with timed("serialize"):
+            record = orjson.dumps(result.model_dump()) + b"\n"
+        yield record
+
+def result_status(result: ScrapeResult) -> dict:
+    """How a result was fetched: whether it was cut short, skipped or short-circuited, and in how many attempts."""
+    return {"status": result.status, "truncated": result.truncated, "skipped": result.skipped,
+            "short_circuited": result.short_circuited, "attempts": result.attempts}
+
+def result_content(result: ScrapeResult):
+    """A result's entry in a JSON file download: the HTML, or title/description/text in "text" mode.
+
+    A complete HTML page on the first attempt is just its HTML, as always; otherwise the
+    entry is a dict with the content under "content" or "text" and the ``result_status`` fields.
     """
+    if result.title is not None:
+        return {"title": result.title, "description": result.description, "text": result.content,
+                **result_status(result)}
+    if result.truncated or result.skipped or result.short_circuited or result.attempts > 1:
+        return {"content": result.content, **result_status(result)}
+    return result.content
+
+def content_record(result: ScrapeResult, category: Optional[str] = None) -> dict:
+    """A result's row in an NDJSON, CSV or Parquet download."""
+    record = {"url": result.url, "bytes": len(result.content.encode("utf-8")), "content": result.content,
+              "title": result.title, "description": result.description, **result_status(result)}
+    if category is not None:
+        record["category"] = category
+    return record
+
+def export_format(request: URLListRequest, default: str) -> str:
+    """The download format of a request, rejected with a 400 when its packages are missing."""
+    fmt = request.format or default
     try:
-        logger.info(f"Scraping URL: {url}")
-        async with aiohttp.ClientSession(timeout=ClientTimeout(total=TIMEOUT)) as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    error_message = f"Failed to scrape {url}, status code: {response.status}"
-                    logger.error(error_message)
-                    return url, error_message
-                content = await response.text()
-                logger.info(f"Successfully scraped {url}")
-                return url, content
-    except ClientError as e:
-        error_message = f"Network error scraping {url}: {e}"
-        logger.error(error_message)
-        return url, error_message
-    except asyncio.TimeoutError:
-        error_message = f"Timeout error scraping {url}"
-        logger.error(error_message)
-        return url, error_message
-    except Exception as e:
-        logger.error(f"Unexpected error scraping {url}: {e}")
-        return url, f"Error: {str(e)}"
+        check_available(fmt, request.compression)
+    except ExportUnavailableError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fmt
+
+def export_response(writer: ExportWriter, background_tasks: BackgroundTasks) -> FileResponse:
+    """Finish an export and send it as a download, deleting the file afterwards."""
+    with timed("serialize"):
+        path = writer.close()
+    background_tasks.add_task(clean_up_file, path)
+    return FileResponse(path=path, filename=writer.filename, media_type=writer.media_type, headers=writer.headers)
 
 async def clean_up_file(filepath: str):
     """
@@ -1,164 +1,361 @@
-from typing import List, Dict, Set
-from bs4 import BeautifulSoup
-import httpx
-from urllib.parse import urljoin, urlparse
-import re
+from typing import Callable, List, Dict, Optional, Set
+import asyncio
+import os
 import logging
-import csv
-from pathlib import Path
+from contextlib import nullcontext
+from dataclasses import replace
 
-from config.driver import get_chrome_driver
+from aiohttp import ClientError
+
+from config.http_cache import cached_get
+from config.models import ScrapeResult
+from config.resilience import RETRY_STATUSES, CircuitOpenError, backoff_delay, hedged
+from config.urls import normalize_url, normalize_urls, site_host, url_key
+from engine.budget import BATCH_CONCURRENCY, BATCH_MAX_PAGES, MAX_CRAWL_DEPTH, MAX_CRAWL_PAGES, CrawlBudget
+from engine.discovery import discover_site_urls
+from engine.fetch import FetchOptions, fetch_page, fetch_static_html
+from engine.links import extract_links
+from engine.classifier import classify_urls
+from engine.extract import extract_page_text
+from engine.frontier import SeenSet
+from engine.link_graph import CrawledPage, SiteGraph, content_hash, link_graph
+from engine.page_cache import ExploredPage, PageCache
+from config.metrics import timed
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def fetch_links(url: str, visited_links: Set[str]) -> List[str]:
-    if url in visited_links:
-         logger.info(f"Skipped fetching page (already visited): {url}")
-         return []
-    
-    visited_links.add(url)
-    driver = get_chrome_driver()
+SUBLINK_CONCURRENCY = int(os.getenv("SUBLINK_CONCURRENCY", "4"))  # Sub-links explored at once per crawl
+SCRAPE_WORKERS = 16  # URLs scraped at once per batch iterator; also bounds buffered results
+
+async def fetch_links(url: str, visited_links, concurrency: int = SUBLINK_CONCURRENCY,
+                      options: Optional[FetchOptions] = None, sources: Optional[Dict[str, str]] = None,
+                      max_depth: int = MAX_CRAWL_DEPTH, max_pages: int = MAX_CRAWL_PAGES,
+                      budget: Optional[CrawlBudget] = None, previous: Optional[SiteGraph] = None,
+                      crawled: Optional[Dict[str, CrawledPage]] = None,
+                      pages: Optional[PageCache] = None, on_page: Optional[Callable[[], None]] = None) -> List[str]:
+    """Crawl ``url`` breadth-first down to ``max_depth`` and return every link found along the way.
+
+    ``budget`` and ``pages`` may be shared with other crawls. With ``previous`` the crawl is
+    incremental: pages are revisited at their stored depth and unchanged ones reuse their links.
+    """
+    root = normalize_url(url)
+    root_key = url_key(root)
+    if root_key in visited_links:
+        logger.debug("Skipped fetching page (already visited): %s", url)
+        return []
+    visited_links.add(root_key)
+
+    site = site_host(root)
+    found: Dict[str, str] = {}  # URL key -> first URL seen with that key
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def explore(page_url: str) -> Optional[ExploredPage]:
+        async with semaphore:
+            if budget is None:
+                return await explore_page(page_url, options, previous)
+            async with budget.slot(site):
+                # Pages are spent as slots are granted, so sites share the budget in turn
+                if not budget.take_page():
+                    return None
+                return await explore_page(page_url, options, previous)
+
+    async def visit(page_url: str, depth: int) -> Set[str]:
+        if pages is None:
+            page = await explore(page_url)
+        else:
+            page = await pages.get(page_url, lambda: explore(page_url))
+        if page is None:
+            return set()
+        if on_page is not None:
+            on_page()
+        if sources is not None:
+            sources[page_url] = page.source
+        if previous is not None:
+            key = url_key(page_url)
+            # Unchanged pages keep their stored edges
+            links = None if previous.hashes.get(key) == page.content_hash else page.links
+            crawled[key] = CrawledPage(page_url, page.content_hash, links, depth)
+        return page.links
+
+    seeded: Dict[int, List[str]] = {}  # Depth -> pages of the previous crawl to revisit at that depth
+    if previous is not None:
+        crawled = {} if crawled is None else crawled
+        for page_url, page_depth in previous.crawled_pages():
+            key = url_key(page_url)
+            if page_depth <= max_depth and key not in visited_links:
+                visited_links.add(key)
+                seeded.setdefault(page_depth, []).append(page_url)
+
+    level, depth, fetched = [root] + seeded.pop(0, []), 0, 0
+    while (level or seeded) and fetched < max_pages:
+        level = level[:max_pages - fetched]
+        fetched += len(level)
+        logger.info(f"Crawling {len(level)} page(s) at depth {depth} of {url}")
+        results = await asyncio.gather(*[visit(page_url, depth) for page_url in level], return_exceptions=True)
+
+        next_level = []
+        for page_url, links in zip(level, results):
+            if isinstance(links, Exception):
+                logger.error(f"Error fetching {page_url}: {links}")
+                continue
+            for link in links:
+                found.setdefault(url_key(link), link)
+            if depth >= max_depth:
+                continue
+            # Check-and-add runs on the event loop between awaits, so no page is queued twice
+            with timed("classify"):
+                classified = classify_urls(links)
+            for items in classified.values():
+                for item in items:
+                    key = url_key(item['link'])
+                    if key not in visited_links and site_host(item['link']) == site:
+                        visited_links.add(key)
+                        next_level.append(item['link'])
+        level, depth = next_level + seeded.pop(depth + 1, []), depth + 1
+
+    if previous is not None:
+        # Pages that failed or fell outside max_pages still link where they did last time
+        for key in previous.hashes.keys() - crawled.keys():
+            for link in previous.links_from(key):
+                found.setdefault(url_key(link), link)
+
+    logger.info(f"Completed fetching links from: {url} ({fetched} page(s), {len(found)} link(s))")
+    return list(found.values())
+
+async def explore_page(url: str, options: Optional[FetchOptions] = None,
+                       previous: Optional[SiteGraph] = None) -> ExploredPage:
+    """Fetch one page and find its links, reusing those in ``previous`` when its content is unchanged."""
+    logger.debug("Exploring sub-links for: %s", url)
+    page = await fetch_page(url, options)
+    key = url_key(url)
+    digest = content_hash(page.html)
+    if previous is not None and previous.hashes.get(key) == digest:
+        logger.debug("Unchanged since the last crawl: %s", url)
+        return ExploredPage(url, page.source, digest, previous.links_from(key))
+
+    with timed("parse"):
+        sub_links = set(normalize_urls(extract_links(page.html, url)))
+
+    # Per-link logging is opt-in: formatting a line per URL is a real cost on large crawls
+    if logger.isEnabledFor(logging.DEBUG):
+        for link in sub_links:
+            logger.debug("Found sub-link: %s", link)
+
+    return ExploredPage(url, page.source, digest, sub_links)
+
+async def analyze_site(url: str, options: Optional[FetchOptions] = None, max_depth: int = MAX_CRAWL_DEPTH,
+                       max_pages: int = MAX_CRAWL_PAGES, discover: bool = True, visited_links=None,
+                       budget: Optional[CrawlBudget] = None, incremental: bool = False,
+                       pages: Optional[PageCache] = None,
+                       on_page: Optional[Callable[[], None]] = None) -> Dict[str, object]:
+    """Find a site's page, tag and category URLs and return them in the /analyze response shape.
+
+    Sites with a sitemap are not crawled. With ``incremental`` the response also lists the URLs
+    ``added`` and ``removed`` since the last analysis.
+    """
+    sources = {}
+    all_links = []
+    previous = await asyncio.to_thread(link_graph.load, url) if incremental else None
+    crawled: Dict[str, CrawledPage] = {}
+    discovery = None
+    if discover:
+        # Discovery reads a handful of documents, so it holds a single slot
+        async with budget.slot(site_host(url)) if budget is not None else nullcontext():
+            discovery = await discover_site_urls(url, options)
+    if discovery is not None:
+        sources.update(discovery.sources)
+        all_links.extend(discovery.urls)
 
+    if discovery is not None and discovery.has_sitemap:
+        html = None
+        async with budget.slot(site_host(url)) if budget is not None else nullcontext():
+            if budget is None or budget.take_page():
+                html = await fetch_static_html(url, options)
+        if html:
+            if on_page is not None:
+                on_page()
+            sources[normalize_url(url)] = "http"
+            with timed("parse"):
+                all_links.extend(normalize_urls(extract_links(html, url)))
+    else:
+        visited_links = SeenSet() if visited_links is None else visited_links
+        all_links.extend(await fetch_links(url, visited_links, options=options, sources=sources,
+                                           max_depth=max_depth, max_pages=max_pages, budget=budget,
+                                           previous=previous, crawled=crawled, pages=pages,
+                                           on_page=on_page))
+
+    # Sitemaps, feeds and the crawl may spell the same URL differently
+    unique_links = {url_key(link): link for link in all_links}.values()
+    with timed("classify"):
+        classified = classify_urls(unique_links)
+
+    response_urls = []
+    for page in classified['pages']:
+        response_urls.append({"category": "Page", "url": page['link']})
+    for tag in classified['tags']:
+        response_urls.append({"category": tag['category'], "url": tag['link']})
+    for category in classified['categories']:
+        response_urls.append({"category": category['category'], "url": category['link']})
+
+    logger.info(f"Prepared response with {len(response_urls)} URL(s) for {url}")
+    if previous is None:
+        return {"urls": response_urls, "sources": sources}
+
+    current = {url_key(item["url"]): item for item in response_urls}
+    added = [item for key, item in current.items() if key not in previous.categories]
+    removed = [{"category": category, "url": previous.urls[key]}
+               for key, category in previous.categories.items() if key not in current]
+    nodes = {url_key(link): (link, None) for link in unique_links}
+    nodes.update((key, (item["url"], item["category"])) for key, item in current.items())
+    root_key = url_key(url)
+    if root_key in crawled:
+        nodes.setdefault(root_key, (crawled[root_key].url, None))
+    # Pages nothing links to any more are dropped, so the next crawl does not revisit them
+    crawled = {key: page for key, page in crawled.items() if key in nodes}
+    await asyncio.to_thread(link_graph.save, url, nodes, crawled)
+    logger.info(f"{len(added)} URL(s) added and {len(removed)} removed since the last crawl of {url}")
+    return {"urls": response_urls, "sources": sources, "added": added, "removed": removed}
+
+async def iter_batch_analysis(urls: List[str], options: Optional[FetchOptions] = None,
+                              max_depth: int = MAX_CRAWL_DEPTH, max_pages: int = MAX_CRAWL_PAGES,
+                              total_pages: int = BATCH_MAX_PAGES, concurrency: int = BATCH_CONCURRENCY,
+                              discover: bool = True, incremental: bool = False):
+    """Analyze many sites at once and yield ``(url, result or exception)`` as each site finishes.
+
+    All sites share one ``CrawlBudget``, so ``concurrency`` and ``total_pages``
+    bound the whole batch while slots rotate fairly between sites. They also
+    share a ``PageCache``: a page reachable from several start URLs is fetched
+    once, and its links count towards every site that reaches it. Start URLs
+    that normalize to the same key are analyzed once.
+    """
+    budget = CrawlBudget(total_pages, concurrency)
+    pages = PageCache()
+    roots = list({url_key(url): url for url in urls}.values())
+
+    async def analyze(url: str):
+        try:
+            return url, await analyze_site(url, options, max_depth=max_depth, max_pages=max_pages,
+                                           discover=discover, budget=budget, incremental=incremental,
+                                           pages=pages)
+        except Exception as e:
+            logger.error(f"Error analyzing {url}: {e}")
+            return url, e
+
+    tasks = [asyncio.create_task(analyze(url)) for url in roots]
     try:
-        logger.info(f"Fetching page: {url}")
-        driver.get(url)
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        # Extract and normalize all links from the page
-        base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-        links = set(urljoin(base_url, a['href']) for a in soup.find_all('a', href=True))
-
-        # Log each found link
-        for link in links:
-            logger.info(f"Found link: {link}")
-
-        # Initialize sets to store unique URLs
-        all_urls = set(links)
-        pages = extract_unique_pages(all_urls)
-        tags = extract_unique_tags(all_urls)
-        categories = extract_unique_categories(all_urls)
-        
-        # Recursively explore pages, tags, and categories
-        for page in pages:
-            sub_links = await explore_sub_links(page['link'], visited_links)
-            all_urls.update(sub_links)
-
-        for tag in tags:
-            sub_links = await explore_sub_links(tag['link'], visited_links)
-            all_urls.update(sub_links)
-
-        for category in categories:
-            sub_links = await explore_sub_links(category['link'], visited_links)
-            all_urls.update(sub_links)
-
-        logger.info(f"Completed fetching links from: {url}")
-        
-    except Exception as e:
-        logger.error(f"Error fetching {url}: {e}")
-        
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
     finally:
-        driver.quit()
-
-    return list(all_urls)
-
-async def explore_sub_links(url: str, visited_links: Set[str]) -> Set[str]:
-    if url in visited_links:
-      logger.info(f"Skipped exploring sub-links (already visited): {url}")
-      return set()
-    
-    visited_links.add(url)
-    driver = get_chrome_driver()
-    """Explore sub-links under a given URL (e.g., pages, tags, categories)."""
-    try:
-        logger.info(f"Exploring sub-links for: {url}")
-        driver.get(url)
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        # Stop crawling if the consumer stops early, e.g. a streaming client went away
+        for task in tasks:
+            task.cancel()
+        pages.close()
+    logger.info(f"Analyzed {len(roots)} site(s), {total_pages - budget.pages_left} page(s) of the batch budget used")
 
-        base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-        sub_links = set(urljoin(base_url, a['href']) for a in soup.find_all('a', href=True))
 
-        # Log each found sub-link
-        for link in sub_links:
-            logger.info(f"Found sub-link: {link}")
+async def iter_scrape_results(urls: list[str], options: FetchOptions, workers: int = SCRAPE_WORKERS):
+    """
+    Scrape URLs with a fixed number of workers and yield results in completion order.
+    The result queue is bounded, so a slow client pauses the workers instead of
+    letting finished pages pile up in memory.
+    """
+    queue = asyncio.Queue(maxsize=workers)
+    pending = iter(urls)
+
+    async def worker():
+        for url in pending:
+            try:
+                result = await scrape_single_url(url, options)
+            except Exception as e:
+                result = ScrapeResult(url=url, content=f"Error: {str(e)}")
+            await queue.put(result)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(min(workers, len(urls)))]
+    try:
+        for _ in range(len(urls)):
+            yield await queue.get()
     finally:
-        driver.quit()
-
-    return sub_links
-
-def extract_unique_pages(urls: Set[str]) -> List[Dict[str, str]]:
-    """Extract URLs with pagination."""
-    pages = []
-    page_pattern = re.compile(r'/pages?(/|$)', re.IGNORECASE)
-
-    for url in urls:
-        path = urlparse(url).path
-        if page_pattern.search(path):
-            segments = path.strip('/').split('/')
-            if len(segments) > 1 and segments[0] in ['page', 'pages']:
-                page_number = segments[1]
-                if page_number.isdigit() and int(page_number) <= 100:
-                    pages.append({
-                        'category': 'Pages',
-                        'link': url
-                    })
-
-    logger.info(f"Extracted pages: {pages}")
-    return pages
-
-def extract_unique_tags(urls: Set[str]) -> List[Dict[str, str]]:
-    """Extract URLs with tags."""
-    tags = []
-    tag_pattern = re.compile(r'/tag/([^/]+)/?', re.IGNORECASE)
-
-    for url in urls:
-        match = tag_pattern.search(urlparse(url).path)
-        if match:
-            tag_name = match.group(1)
-            tags.append({
-                'category': f"{tag_name.capitalize()}",
-                'link': url
-            })
-
-    logger.info(f"Extracted tags: {tags}")
-    return tags
-
-def extract_unique_categories(urls: Set[str]) -> List[Dict[str, str]]:
-    """Extract URLs with categories."""
-    categories = []
-    category_pattern = re.compile(r'/category/([^/]+)/?', re.IGNORECASE)
-
-    for url in urls:
-        match = category_pattern.search(urlparse(url).path)
-        if match:
-            category_name = match.group(1)
-            categories.append({
-                'category': f"{category_name.capitalize()}",
-                'link': url
-            })
-
-    logger.info(f"Extracted categories: {categories}")
-    return categories
-
-async def scrape_content(urls: List[str]) -> Dict[str, Dict[str, str]]:
+        # Stop scraping if the consumer stops early, e.g. a streaming client went away
+        for task in tasks:
+            task.cancel()
+
+async def scrape_single_url(url: str, options: Optional[FetchOptions] = None) -> ScrapeResult:
+    """
+    Scrape a single URL's content using the shared aiohttp session and HTTP cache.
+    Transient failures are retried with jittered backoff, and hosts whose circuit
+    is open are skipped without sending a request. In "text" content mode the page
+    is reduced to its title, meta description and main text in the parser pool.
+    """
+    options = options or FetchOptions()
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            logger.debug("Scraping URL: %s", url)
+            response = await hedged(lambda: cached_get(url, options.cache_mode, options.cache_ttl, options.max_bytes,
+                                                       text_only=True), options.hedge_after)
+        except CircuitOpenError as e:
+            error_message = f"Skipped {url}: {e}"
+            logger.warning(error_message)
+            return ScrapeResult(url=url, content=error_message, short_circuited=True, attempts=attempts)
+        except (ClientError, asyncio.TimeoutError) as e:
+            if attempts <= options.retries:
+                await asyncio.sleep(backoff_delay(attempts))
+                continue
+            if isinstance(e, ClientError):
+                error_message = f"Network error scraping {url}: {e}"
+            else:
+                error_message = f"Timeout error scraping {url}"
+            logger.error(error_message)
+            return ScrapeResult(url=url, content=error_message, attempts=attempts)
+        except Exception as e:
+            logger.error(f"Unexpected error scraping {url}: {e}")
+            return ScrapeResult(url=url, content=f"Error: {str(e)}", attempts=attempts)
+
+        if response.status in RETRY_STATUSES and attempts <= options.retries:
+            await asyncio.sleep(backoff_delay(attempts))
+            continue
+
+        if response.status != 200:
+            error_message = f"Failed to scrape {url}, status code: {response.status}"
+            logger.error(error_message)
+            return ScrapeResult(url=url, status=response.status, content=error_message, attempts=attempts)
+        if response.skipped:
+            reason = f"not a text document ({response.content_type})"
+            logger.info(f"Skipped {url}: {reason}")
+            return ScrapeResult(url=url, status=response.status, content=f"Skipped {url}: {reason}",
+                                attempts=attempts, skipped=reason)
+        logger.debug("Successfully scraped %s (cache: %s)", url, response.cache_status)
+        if options.content_mode == "text":
+            with timed("extract_text"):
+                page = await extract_page_text(response.text())
+            return ScrapeResult(url=url, status=response.status, content=page['text'], title=page['title'],
+                                description=page['description'], attempts=attempts, truncated=response.truncated)
+        return ScrapeResult(url=url, status=response.status, content=response.text(), attempts=attempts,
+                            truncated=response.truncated)
+
+async def scrape_content(urls: List[str], options: Optional[FetchOptions] = None) -> Dict[str, Dict[str, str]]:
+    """Return the title, meta description and main text of each URL, keyed by URL."""
+    options = replace(options or FetchOptions(), content_mode="text")
     results = {}
-    for url in urls:
-        logger.info(f"Scraping content from: {url}")
-        response = await httpx.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        results[url] = {
-            'title': soup.title.string if soup.title else 'No Title',
-            'body': soup.body.get_text(strip=True) if soup.body else 'No Content'
+    async for result in iter_scrape_results(urls, options):
+        results[result.url] = {
+            'title': result.title or 'No Title',
+            'description': result.description or '',
+            'body': (result.content or 'No Content') if result.status == 200 else 'No Content',
         }
     return results
 
-async def write_links_to_csv(links: List[str], filename: str = "unique_links.csv") -> str:
-    """Write the list of links to a CSV file and return the filename."""
-    filepath = Path(filename)
-    with filepath.open(mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(["URL"])
-        for link in links:
-            writer.writerow([link])
-    return str(filepath)
+def link_records(links: List[str]):
+    """Yield one export row per link: its URL, type ("page", "tag", "category" or None) and category name."""
+    with timed("classify"):
+        classified = classify_urls(links)
+    kinds = {}
+    for kind, key in (("page", "pages"), ("tag", "tags"), ("category", "categories")):
+        for item in classified[key]:
+            kinds[item['link']] = (kind, item['category'])
+    for link in links:
+        kind, category = kinds.get(link, (None, None))
+        yield {"url": link, "type": kind, "category": category}
@@ -0,0 +1,197 @@
+"""Benchmark /analyze, /scrape-links/ and /scrape-all-urls/ against a local synthetic blog.
+
+Run from the repository root:
+
+    python benchmarks/bench_endpoints.py --posts 500 --latency 0.02 --error-rate 0.01
+
+For every endpoint it reports pages fetched from the site per second, request
+latency percentiles, peak RSS and the peak number of open sockets in this
+process. The app runs in-process with a throwaway working directory, so the
+HTTP cache, job store and temp files never touch the repository. Cached pages
+are always revalidated, so repeated requests still reach the site. Per-host
+rate limits are raised with --host-rate so the numbers measure the app, not
+its politeness settings. The site counts its own 500s and the socket count
+includes the site's, since it runs in this process too.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from synthetic_site import SyntheticSite
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (Linux /proc, falling back to the peak)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def open_sockets() -> int:
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return -1  # Not available on this platform
+    sockets = 0
+    for fd in fds:
+        try:
+            sockets += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            pass  # Closed since listdir(), including listdir's own descriptor
+    return sockets
+
+
+class ResourceSampler:
+    """Samples RSS and open sockets in a background thread and keeps the peaks."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_sockets = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_rss = max(self.peak_rss, current_rss())
+            self.peak_sockets = max(self.peak_sockets, open_sockets())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "ResourceSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def run_endpoint(client, site: SyntheticSite, name: str, requests: list, concurrency: int) -> dict:
+    """Send ``requests`` (path, JSON body) pairs, ``concurrency`` at a time, and summarise them."""
+    site.reset_stats()
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(path: str, body: dict):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(path, json=body)
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                failures += 1
+
+    with ResourceSampler() as sampler:
+        started = time.perf_counter()
+        await asyncio.gather(*[send(path, body) for path, body in requests])
+        elapsed = time.perf_counter() - started
+    return {
+        "endpoint": name,
+        "requests": len(requests),
+        "failed": failures,
+        "site_pages": site.stats.requests,
+        "pages_per_sec": site.stats.requests / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "mean": statistics.fmean(latencies) if latencies else float("nan"),
+        "peak_rss_mb": sampler.peak_rss / 1024 / 1024,
+        "peak_sockets": sampler.peak_sockets,
+        "elapsed": elapsed,
+    }
+
+
+def print_report(results: list):
+    header = (f"{'endpoint':<18}{'reqs':>6}{'fail':>6}{'pages':>8}{'pages/s':>10}"
+              f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MB':>9}{'sockets':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['endpoint']:<18}{r['requests']:>6}{r['failed']:>6}{r['site_pages']:>8}{r['pages_per_sec']:>10.1f}"
+              f"{r['p50'] * 1000:>10.1f}{r['p95'] * 1000:>10.1f}{r['p99'] * 1000:>10.1f}"
+              f"{r['peak_rss_mb']:>9.1f}{r['peak_sockets']:>9}")
+
+
+async def benchmark(args, site: SyntheticSite) -> list:
+    import httpx
+    from main import app
+
+    root = f"{site.url}/"
+    scrape_urls = site.post_urls()[:args.scrape_urls]
+    plan = {
+        "analyze": [("/analyze", {"url": root, "max_depth": args.max_depth, "max_pages": args.max_pages})]
+        * args.repeat,
+        "scrape-links": [("/scrape-links/", {"urls": [root], "cache": "bypass"})] * args.repeat,
+        "scrape-all-urls": [("/scrape-all-urls/", {"urls": scrape_urls, "stream": True, "cache": "bypass",
+                                                   "mode": args.mode})] * args.repeat,
+    }
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in args.endpoints:
+                results.append(await run_endpoint(client, site, name, plan[name], args.concurrency))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=300, help="Posts on the synthetic site")
+    parser.add_argument("--posts-per-page", type=int, default=10)
+    parser.add_argument("--tags", type=int, default=20)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--page-bytes", type=int, default=20_000, help="Approximate size of each HTML page")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds added to every response")
+    parser.add_argument("--latency-jitter", type=float, default=0.01, help="Extra random delay, up to this")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of responses that are 500s")
+    parser.add_argument("--endpoints", nargs="+", default=["analyze", "scrape-links", "scrape-all-urls"],
+                        choices=["analyze", "scrape-links", "scrape-all-urls"])
+    parser.add_argument("--repeat", type=int, default=3, help="Requests sent per endpoint")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight per endpoint")
+    parser.add_argument("--max-depth", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=500)
+    parser.add_argument("--scrape-urls", type=int, default=200, help="Post URLs per /scrape-all-urls/ request")
+    parser.add_argument("--mode", choices=["html", "text"], default="html")
+    parser.add_argument("--host-rate", type=float, default=1000.0, help="Per-host request rate limit")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so set them before the app is imported
+    os.environ.setdefault("HOST_INITIAL_RATE", str(args.host_rate))
+    os.environ.setdefault("HOST_MAX_RATE", str(args.host_rate))
+    os.environ.setdefault("DRIVER_POOL_WARM_UP", "0")
+    os.environ.setdefault("HTTP_CACHE_TTL", "0")  # Every fetch goes to the site, even on repeated requests
+    os.chdir(tempfile.mkdtemp(prefix="scrape-bench-"))
+    sys.path.insert(0, os.path.dirname(APP_DIR))
+    sys.path.insert(0, APP_DIR)
+
+    with SyntheticSite(posts=args.posts, posts_per_page=args.posts_per_page, tags=args.tags,
+                       categories=args.categories, page_bytes=args.page_bytes, latency=args.latency,
+                       latency_jitter=args.latency_jitter, error_rate=args.error_rate) as site:
+        print(f"Synthetic site: {site.posts} posts, {site.archive_pages} archive pages, "
+              f"~{site.page_bytes // 1024} KiB/page, latency {site.latency * 1000:.0f}"
+              f"+{site.latency_jitter * 1000:.0f} ms, {site.error_rate:.0%} errors")
+        results = asyncio.run(benchmark(args, site))
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare link extraction with the full BeautifulSoup tree against engine.links.
+
+Run from the repository root:
+
+    python benchmarks/bench_link_extraction.py --links 5000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+from engine.links import extract_links  # noqa: E402
+
+PAGE_URL = "https://blog.example.com/page/2/"
+
+
+def generate_page(links: int) -> str:
+    """A blog-like page: navigation, article teasers with text, and a footer."""
+    parts = ["<html><head><title>Bench</title><base href='https://blog.example.com/'></head><body><nav>"]
+    parts += [f"<a href='/category/topic-{i}/'>Topic {i}</a>" for i in range(20)]
+    parts.append("</nav><main>")
+    for i in range(links):
+        parts.append(
+            f"<article><h2><a href='/posts/{i}/'>Post {i}</a></h2>"
+            f"<p>{'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 6}</p>"
+            f"<a href='/tag/tag-{i % 50}/'>#tag</a> <img src='/img/{i}.jpg'></article>"
+        )
+    parts.append("</main><footer><a href='/page/3/'>Next</a></footer></body></html>")
+    return "".join(parts)
+
+
+def soup_links(html: str, url: str) -> set:
+    """The previous implementation: full html.parser tree, then find_all('a')."""
+    soup = BeautifulSoup(html, "html.parser")
+    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+    return set(urljoin(base_url, a["href"]) for a in soup.find_all("a", href=True))
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=5000, help="Article links on the generated page")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    html = generate_page(args.links)
+    print(f"Page size: {len(html) / 1024:.0f} KiB, {args.links * 2 + 21} anchors")
+
+    soup_time = best_of(lambda: soup_links(html, PAGE_URL), args.repeat)
+    fast_time = best_of(lambda: extract_links(html, PAGE_URL), args.repeat)
+    print(f"BeautifulSoup html.parser: {soup_time * 1000:8.1f} ms")
+    print(f"engine.links lxml target:  {fast_time * 1000:8.1f} ms  ({soup_time / fast_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
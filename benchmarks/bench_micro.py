@@ -0,0 +1,124 @@
+"""Micro-benchmarks for link extraction, URL classification, HTML text extraction and PDF text extraction.
+
+Run from the repository root:
+
+    python benchmarks/bench_micro.py --links 5000 --urls 100000 --pdf-pages 500
+
+Each benchmark prints the best of --repeat runs. The PDF benchmark compares
+the old single-threaded loop over ``reader.pages`` with the process-pool
+``iter_page_texts`` and also reports how long the first page takes to arrive.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, "app"))
+sys.path.append(ROOT_DIR)
+
+from bench_link_extraction import PAGE_URL, best_of, generate_page  # noqa: E402
+from synthetic_pdf import generate_pdf  # noqa: E402
+
+
+def generate_urls(count: int) -> list:
+    """Blog URLs in roughly the mix a crawl finds: mostly posts, some archives and noise."""
+    urls = []
+    for i in range(count):
+        kind = i % 10
+        if kind < 6:
+            urls.append(f"https://blog.example.com/{2000 + i % 25}/{1 + i % 12:02d}/post-{i}/")
+        elif kind == 6:
+            urls.append(f"https://blog.example.com/page/{i % 150}/")
+        elif kind == 7:
+            urls.append(f"https://blog.example.com/tag/tag-{i % 300}/")
+        elif kind == 8:
+            urls.append(f"https://blog.example.com/category/topic-{i % 40}/")
+        else:
+            urls.append(f"https://cdn.example.net/assets/{i}.js?v={i % 7}")
+    return urls
+
+
+def bench_links(args):
+    from engine.links import extract_links
+
+    html = generate_page(args.links)
+    seconds = best_of(lambda: extract_links(html, PAGE_URL), args.repeat)
+    print(f"extract_links        {len(html) / 1024:8.0f} KiB page      {seconds * 1000:9.1f} ms")
+
+
+def bench_classify(args):
+    from engine.classifier import URLClassifier, DEFAULT_RULES
+
+    urls = generate_urls(args.urls)
+
+    def classify_cold():
+        # A fresh classifier, so the memo cache does not hide the matching cost
+        URLClassifier(DEFAULT_RULES).classify(urls)
+
+    seconds = best_of(classify_cold, args.repeat)
+    print(f"classify_urls        {len(urls):8d} URLs          {seconds * 1000:9.1f} ms"
+          f"  ({len(urls) / seconds / 1000:.0f}k URLs/s)")
+
+
+def bench_html_text(args):
+    from engine.extract import extract_text
+
+    html = generate_page(args.links)
+    seconds = best_of(lambda: extract_text(html), args.repeat)
+    print(f"extract_text (HTML)  {len(html) / 1024:8.0f} KiB page      {seconds * 1000:9.1f} ms")
+
+
+def bench_pdf(args):
+    from PyPDF2 import PdfReader
+    from packages.pdfextract.services import iter_page_texts, shutdown_executor
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as pdf:
+        pdf.write(generate_pdf(args.pdf_pages))
+    size_kib = os.path.getsize(path) / 1024
+
+    def sequential():
+        text = ""
+        for page in PdfReader(path).pages:
+            text += page.extract_text() or ""
+
+    async def pooled():
+        started = time.perf_counter()
+        first = None
+        async for _ in iter_page_texts(path):
+            if first is None:
+                first = time.perf_counter() - started
+        return first, time.perf_counter() - started
+
+    try:
+        seconds = best_of(sequential, args.repeat)
+        print(f"PDF sequential       {args.pdf_pages:5d} pages {size_kib:6.0f} KiB {seconds * 1000:9.1f} ms")
+        asyncio.run(pooled())  # Start the worker processes outside the measurement
+        first, total = min(asyncio.run(pooled()) for _ in range(args.repeat))
+        print(f"PDF process pool     {args.pdf_pages:5d} pages {size_kib:6.0f} KiB {total * 1000:9.1f} ms"
+              f"  (first page after {first * 1000:.1f} ms, {os.cpu_count()} CPUs)")
+    finally:
+        shutdown_executor()
+        os.remove(path)
+
+
+BENCHMARKS = {"links": bench_links, "classify": bench_classify, "html-text": bench_html_text, "pdf": bench_pdf}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=5000, help="Article links on the generated HTML page")
+    parser.add_argument("--urls", type=int, default=100_000, help="URLs to classify")
+    parser.add_argument("--pdf-pages", type=int, default=300, help="Pages in the generated PDF")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    args = parser.parse_args()
+    for name in args.only:
+        BENCHMARKS[name](args)
+
+
+if __name__ == "__main__":
+    main()
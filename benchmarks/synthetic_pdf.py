@@ -0,0 +1,33 @@
+"""Generate text-only PDFs of any length for benchmarks, without extra dependencies."""
+
+WORDS = ("extraction throughput latency crawler archive category paper section result method "
+         "figure table appendix reference abstract conclusion").split()
+
+
+def page_lines(page: int, lines: int) -> list:
+    return [" ".join(WORDS[(page + line + word) % len(WORDS)] for word in range(12)) for line in range(lines)]
+
+
+def generate_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """A PDF with ``pages`` pages of ``lines_per_page`` lines of Helvetica text each."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = " T* ".join(f"({line}) Tj" for line in page_lines(page, lines_per_page))
+        content = f"BT /F1 10 Tf 12 TL 50 760 Td (Page {page + 1}) Tj T* {text} ET"
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
@@ -0,0 +1,237 @@
+"""A generated blog served over localhost for benchmarks.
+
+The site has ``posts`` posts listed ``posts_per_page`` to an archive page
+(``/``, ``/page/N/``), plus ``/tag/<name>/`` and ``/category/<name>/``
+archives. Every response can be delayed and a share of them can fail with a
+500, so crawls meet the latency and errors of a real site.
+
+With ``sitemap``, robots.txt names ``/sitemap_index.xml``, an index of
+``/sitemap-archives.xml`` and a gzipped ``/sitemap-posts.xml.gz``. With
+``feed``, the home page links an RSS feed of the newest posts at ``/feed/``.
+
+    with SyntheticSite(posts=500, latency=0.02, error_rate=0.01) as site:
+        print(site.url)
+"""
+import asyncio
+import gzip
+import random
+import threading
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+FILLER = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt. "
+
+
+@dataclass
+class SiteStats:
+    requests: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+    paths: dict = field(default_factory=dict)  # Path -> times served
+
+
+class SyntheticSite:
+    def __init__(self, posts: int = 200, posts_per_page: int = 10, tags: int = 20, categories: int = 8,
+                 page_bytes: int = 20_000, latency: float = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0, sitemap: bool = False, feed: bool = False):
+        self.posts = posts
+        self.posts_per_page = posts_per_page
+        self.tags = tags
+        self.categories = categories
+        self.page_bytes = page_bytes
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.sitemap = sitemap
+        self.feed = feed
+        self.stats = SiteStats()
+        self.url = ""
+        self._random = random.Random(seed)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    # -- Content -------------------------------------------------------------
+
+    @property
+    def archive_pages(self) -> int:
+        return max(1, -(-self.posts // self.posts_per_page))
+
+    def post_tags(self, post: int) -> list:
+        return [f"tag-{post % self.tags}", f"tag-{(post * 7) % self.tags}"]
+
+    def post_category(self, post: int) -> str:
+        return f"category-{post % self.categories}"
+
+    def post_urls(self) -> list:
+        return [f"{self.url}/posts/{post}/" for post in range(self.posts)]
+
+    def archive_urls(self) -> list:
+        pages = [f"{self.url}/"] + [f"{self.url}/page/{page}/" for page in range(2, self.archive_pages + 1)]
+        return (pages + [f"{self.url}/tag/tag-{i}/" for i in range(self.tags)]
+                + [f"{self.url}/category/category-{i}/" for i in range(self.categories)])
+
+    def feed_urls(self) -> list:
+        """Posts in the RSS feed: the newest ``posts_per_page`` of them."""
+        return [f"{self.url}/posts/{post}/" for post in reversed(range(max(0, self.posts - self.posts_per_page),
+                                                                          self.posts))]
+
+    def _sitemap_document(self, path: str):
+        """Body and content type of a sitemap or feed at ``path``, or None when the site has none there."""
+        if self.sitemap and path == "/sitemap_index.xml":
+            entries = "".join(f"<sitemap><loc>{self.url}{name}</loc></sitemap>"
+                              for name in ("/sitemap-archives.xml", "/sitemap-posts.xml.gz"))
+            body = (f"<?xml version='1.0' encoding='UTF-8'?><sitemapindex "
+                    f"xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>{entries}</sitemapindex>")
+            return body.encode(), "application/xml"
+        if self.sitemap and path in ("/sitemap-archives.xml", "/sitemap-posts.xml.gz"):
+            urls = self.archive_urls() if path == "/sitemap-archives.xml" else self.post_urls()
+            entries = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+            body = (f"<?xml version='1.0' encoding='UTF-8'?><urlset "
+                    f"xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>{entries}</urlset>").encode()
+            return (gzip.compress(body), "application/gzip") if path.endswith(".gz") else (body, "application/xml")
+        if self.feed and path == "/feed/":
+            items = "".join(f"<item><title>{url}</title><link>{url}</link></item>" for url in self.feed_urls())
+            body = (f"<?xml version='1.0' encoding='UTF-8'?><rss version='2.0'><channel>"
+                    f"<title>Synthetic blog</title><link>{self.url}/</link>{items}</channel></rss>")
+            return body.encode(), "application/rss+xml"
+        return None
+
+    def _layout(self, title: str, body: str) -> str:
+        nav = "".join(f"<a href='/category/category-{i}/'>Category {i}</a>" for i in range(self.categories))
+        padding = max(0, self.page_bytes - len(body) - len(nav) - 400)
+        filler = (FILLER * (padding // len(FILLER) + 1))[:padding]
+        feed = "<link rel='alternate' type='application/rss+xml' href='/feed/'>" if self.feed else ""
+        return (f"<!DOCTYPE html><html><head><title>{title}</title>"
+                f"<meta name='description' content='{title} on the synthetic blog'>{feed}</head>"
+                f"<body><nav><a href='/'>Home</a>{nav}</nav><main>{body}<p>{filler}</p></main>"
+                f"<footer><a href='/about/'>About</a></footer></body></html>")
+
+    def _listing(self, title: str, posts, page: int, pages: int, prefix: str) -> str:
+        items = []
+        for post in posts:
+            tags = "".join(f"<a href='/tag/{tag}/'>#{tag}</a> " for tag in self.post_tags(post))
+            items.append(f"<article><h2><a href='/posts/{post}/'>Post {post}</a></h2>"
+                         f"<a href='/category/{self.post_category(post)}/'>{self.post_category(post)}</a> {tags}"
+                         f"<p>{FILLER}</p></article>")
+        pager = "".join(f"<a href='{prefix}page/{number}/'>{number}</a>" for number in range(2, pages + 1))
+        return self._layout(title, "".join(items) + f"<div class='pager'>{pager}</div>")
+
+    def render(self, path: str):
+        """HTML for ``path``, or None for a 404."""
+        parts = [part for part in path.split("/") if part]
+        if parts[-2:-1] == ["page"] and parts[-1].isdigit():
+            page, parts = int(parts[-1]), parts[:-2]
+        else:
+            page = 1
+
+        if not parts:
+            posts = range(self.posts)
+            title = "Home"
+            prefix = "/"
+        elif len(parts) == 2 and parts[0] in ("tag", "category"):
+            kind, name = parts
+            if kind == "tag":
+                posts = [post for post in range(self.posts) if name in self.post_tags(post)]
+            else:
+                posts = [post for post in range(self.posts) if self.post_category(post) == name]
+            if not posts:
+                return None
+            title = f"{kind.title()}: {name}"
+            prefix = f"/{kind}/{name}/"
+        elif len(parts) == 2 and parts[0] == "posts" and parts[1].isdigit() and int(parts[1]) < self.posts:
+            post = int(parts[1])
+            links = "".join(f"<a href='/tag/{tag}/'>#{tag}</a> " for tag in self.post_tags(post))
+            related = "".join(f"<a href='/posts/{(post + i) % self.posts}/'>Related {i}</a> " for i in range(1, 4))
+            return self._layout(f"Post {post}", f"<article><h1>Post {post}</h1>"
+                                f"<a href='/category/{self.post_category(post)}/'>{self.post_category(post)}</a> "
+                                f"{links}<p>{FILLER * 20}</p>{related}</article>")
+        elif parts == ["about"]:
+            return self._layout("About", "<p>About this blog.</p>" + "".join(
+                f"<a href='/posts/{i}/'>Post {i}</a>" for i in range(min(5, self.posts))))
+        else:
+            return None
+
+        posts = list(posts)
+        pages = max(1, -(-len(posts) // self.posts_per_page))
+        if page > pages:
+            return None
+        start = (page - 1) * self.posts_per_page
+        return self._listing(title, posts[start:start + self.posts_per_page], page, pages, prefix)
+
+    # -- Server --------------------------------------------------------------
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.stats.requests += 1
+        self.stats.paths[request.path] = self.stats.paths.get(request.path, 0) + 1
+        delay = self.latency + self._random.uniform(0, self.latency_jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if request.path == "/robots.txt":
+            sitemap = f"Sitemap: {self.url}/sitemap_index.xml\n" if self.sitemap else ""
+            return web.Response(text="User-agent: *\nAllow: /\n" + sitemap)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.stats.errors += 1
+            return web.Response(status=500, text="Injected error")
+        document = self._sitemap_document(request.path)
+        if document is not None:
+            body, content_type = document
+            self.stats.bytes_sent += len(body)
+            return web.Response(body=body, content_type=content_type)
+        html = self.render(request.path)
+        if html is None:
+            return web.Response(status=404, text="Not found")
+        self.stats.bytes_sent += len(html)
+        return web.Response(text=html, content_type="text/html")
+
+    def start(self) -> "SyntheticSite":
+        ready = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            app = web.Application()
+            app.router.add_get("/{tail:.*}", self._handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, "127.0.0.1", 0, backlog=1024)
+            self._loop.run_until_complete(site.start())
+            port = site._server.sockets[0].getsockname()[1]
+            self.url = f"http://127.0.0.1:{port}"
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name="synthetic-site", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def reset_stats(self):
+        self.stats = SiteStats()
+
+    def __enter__(self) -> "SyntheticSite":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import time
+
+    with SyntheticSite() as site:
+        print(f"Serving a synthetic blog with {site.posts} posts at {site.url}/ (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,111 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Cache settings, overridable from the environment
+PDF_CACHE_PATH = os.getenv("PDF_CACHE_PATH", os.path.join(".cache", "pdf_cache.sqlite3"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def cache_key(digest: str, **options) -> str:
+    """Key for one extraction: the upload's SHA-256 plus every option that changes the result."""
+    settings = ",".join(f"{name}={options[name]}" for name in sorted(options))
+    return f"{digest}:{settings}"
+
+
+class PDFResultCache:
+    """Size-bounded on-disk cache of PDF extraction results keyed by content hash.
+
+    Results are stored as JSON and evicted least-recently-used first once the
+    cache grows past ``max_bytes``. ``hits`` and ``misses`` count lookups since
+    the process started.
+    """
+
+    def __init__(self, path: str = PDF_CACHE_PATH, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        self._entries = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, body BLOB, accessed_at REAL, size INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+            self._entries, self._total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT body FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        return orjson.loads(row[0])
+
+    def put(self, key: str, result: dict):
+        body = orjson.dumps(result)
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._connect()
+            old = conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, body, time.time(), len(body)))
+            self._total_bytes += len(body) - (old[0] if old else 0)
+            self._entries += 0 if old else 1
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        while self._total_bytes > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM results ORDER BY accessed_at LIMIT 20").fetchall()
+            if not rows:
+                self._total_bytes = self._entries = 0
+                break
+            conn.executemany("DELETE FROM results WHERE key = ?", [(key,) for key, _ in rows])
+            self._total_bytes -= sum(size for _, size in rows)
+            self._entries -= len(rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._connect()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "entries": self._entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+pdf_cache = PDFResultCache()
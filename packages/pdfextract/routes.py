@@ -1,31 +1,104 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from pathlib import Path
-import shutil
-from config.file_utils import create_temp_folder  # Import your function to create the directory
-from .services import extract_text_and_images
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import orjson
+from .cache import cache_key, pdf_cache
+from .services import (
+    collect_images, count_pages, extract_text_and_images, get_executor, iter_page_texts, page_range, text_response,
+)
+from .upload import NotAPDFError, ReceivedPDF, UploadTooLargeError, receive_pdf
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 @router.post("/extract")
-async def upload_pdf(file: UploadFile = File(...)):
-    if not file.filename.endswith(".pdf"):
+async def upload_pdf(response: Response,
+                     file: UploadFile = File(...),
+                     first_page: Optional[int] = Query(None, ge=1),
+                     last_page: Optional[int] = Query(None, ge=1),
+                     stream: bool = Query(False),
+                     images: bool = Query(False),
+                     thumbnail_size: Optional[int] = Query(None, ge=16, le=1024)):
+    """
+    Extract a PDF's text, optionally from a page range only. With `stream` set the
+    text comes back as newline-delimited JSON, one {"page", "text"} record per page,
+    in page order as soon as each page is extracted.
+
+    Images are only extracted when `images` is set: each distinct image is saved
+    once, with the pages it appears on and, given `thumbnail_size`, a thumbnail.
+    Streams send them as {"image"} records after the pages.
+
+    Results are cached by the upload's SHA-256 and the extraction options; the
+    X-Cache response header says whether this one was a "hit" or a "miss".
+    """
+    if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed.")
-    
-    # Create the temporary folder if it doesn't exist
-    temp_dir = create_temp_folder('temp')  # You can change the folder name if needed
 
-    # Define the full path to store the uploaded file
-    temp_file_path = Path(temp_dir) / file.filename
+    # One pass over the upload checks its size and header, hashes it and spools it
+    try:
+        pdf = await receive_pdf(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except NotAPDFError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        thumbnail_size = thumbnail_size if images else None
+        key = cache_key(pdf.digest, first_page=first_page, last_page=last_page, images=images,
+                        thumbnail_size=thumbnail_size)
+        cached = await asyncio.to_thread(pdf_cache.get, key)
+        if cached is not None:
+            if stream:
+                return StreamingResponse(iter_cached_pages(cached), media_type=NDJSON_MEDIA_TYPE,
+                                         headers={"X-Cache": "hit"})
+            response.headers["X-Cache"] = "hit"
+            return text_response(cached)
+
+        # Workers open a file once each; in-memory bytes would be sent with every chunk of pages
+        await pdf.spill()
+        if stream:
+            # Validate the page range up front so a bad range is a 400, not a broken stream
+            total = await asyncio.get_running_loop().run_in_executor(get_executor(), count_pages, pdf.source)
+            page_range(total, first_page, last_page)
+            streamed, pdf = pdf, None
+            return StreamingResponse(stream_pages(streamed, first_page, last_page, key, images, thumbnail_size, total),
+                                     media_type=NDJSON_MEDIA_TYPE, headers={"X-Cache": "miss"})
+        result = await extract_text_and_images(pdf.source, first_page, last_page, images, thumbnail_size)
+        await asyncio.to_thread(pdf_cache.put, key, result)
+        response.headers["X-Cache"] = "miss"
+        return text_response(result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Clean up: Delete the spooled upload after processing; a stream deletes its own
+        if pdf is not None:
+            pdf.discard()
 
-    # Save the file to the temp directory
-    with open(temp_file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
+@router.get("/cache")
+async def cache_stats():
+    """Hit/miss counters and size of the extraction result cache."""
+    return await asyncio.to_thread(pdf_cache.stats)
+
+async def stream_pages(pdf: ReceivedPDF, first_page: Optional[int], last_page: Optional[int], key: str,
+                       images: bool = False, thumbnail_size: Optional[int] = None, total: Optional[int] = None):
+    """Yield one NDJSON record per page and per image, then cache them and delete the spooled upload."""
+    pages = []
     try:
-        # Process the PDF file (assuming you have a function to extract text and images)
-        result = extract_text_and_images(str(temp_file_path))
-        return result
+        async for number, text in iter_page_texts(pdf.source, first_page, last_page, total):
+            pages.append([number, text])
+            yield orjson.dumps({"page": number, "text": text}) + b"\n"
+        found = await collect_images(pdf.source, [number for number, _ in pages], thumbnail_size) if images else []
+        for image in found:
+            yield orjson.dumps({"image": image}) + b"\n"
+        # Only a complete stream is cached; a client that went away leaves nothing behind
+        await asyncio.to_thread(pdf_cache.put, key, {"pages": pages, "images": found})
     finally:
-        # Clean up: Delete the uploaded file after processing
-        if temp_file_path.exists():
-            temp_file_path.unlink(missing_ok=True)
+        pdf.discard()
+
+async def iter_cached_pages(extraction: dict):
+    for number, text in extraction["pages"]:
+        yield orjson.dumps({"page": number, "text": text}) + b"\n"
+    for image in extraction["images"]:
+        yield orjson.dumps({"image": image}) + b"\n"
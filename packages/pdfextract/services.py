@@ -1,7 +1,32 @@
 from PyPDF2 import PdfReader
 from pathlib import Path
 from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from PyPDF2.filters import _xobj_to_image  # Private, but the same decoder PageObject.images uses
+import asyncio
+import hashlib
 import io
+import logging
+import os
+import time
+
+from config.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))  # Extraction processes
+PAGES_PER_TASK = 4  # Pages per pool task; small so the first pages come back quickly
+TASKS_IN_FLIGHT = 2 * PDF_WORKERS  # Bounds pages held in memory for a slow streaming client
+IMAGES_DIR = "extracted_images"
+THUMBNAILS_DIR = "thumbnails"  # Under IMAGES_DIR
+RAW_IMAGE_EXTENSIONS = {"/DCTDecode": ".jpg", "/JPXDecode": ".jp2"}  # Streams that are already image files
+DECODED_IMAGE_EXTENSIONS = (".png", ".tiff")  # What PyPDF2 turns other image streams into
+
+PdfSource = Union[str, bytes]  # Path of a spooled upload, or a small upload held in memory
+
+_executor: Optional[ProcessPoolExecutor] = None
 
 '''
 TODO: 
@@ -23,22 +48,240 @@ TODO:
     -- The images inside a research paper is not that important inLLMS yet. So we can actually skip this portaion at the moment.
 '''
 
-def extract_text_and_images(pdf_path: str):
-    result = {"text": "", "images": []}
-    reader = PdfReader(pdf_path)
-    
-    # Extract text
-    for page in reader.pages:
-        result["text"] += page.extract_text() or ""
-    
-    # Extract images
-    for page in reader.pages:
-        if hasattr(page, 'images'):
-            for image_file in page.images:
-                img_data = io.BytesIO(image_file.data)
-                img = Image.open(img_data)
-                img_path = Path("extracted_images") / image_file.name
-                img.save(img_path)
-                result["images"].append(str(img_path))
-    
-    return result
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared PDF process pool, starting it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        logger.info(f"Started PDF extraction pool with {PDF_WORKERS} process(es)")
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+@lru_cache(maxsize=2)
+def _open_reader(pdf_path: str, mtime_ns: int, size: int) -> PdfReader:
+    return PdfReader(pdf_path)
+
+
+@lru_cache(maxsize=2)
+def _open_bytes_reader(data: bytes) -> PdfReader:
+    return PdfReader(io.BytesIO(data))
+
+
+def _reader(source: PdfSource) -> PdfReader:
+    # Each worker parses a document once and reuses it for every chunk of pages it gets
+    if isinstance(source, bytes):
+        return _open_bytes_reader(source)
+    stat = os.stat(source)
+    return _open_reader(source, stat.st_mtime_ns, stat.st_size)
+
+
+def count_pages(source: PdfSource) -> int:
+    return len(_reader(source).pages)
+
+
+def extract_page_texts(source: PdfSource, page_numbers: List[int]) -> List[Tuple[str, float]]:
+    """Text of the given 1-based pages, each with the seconds it took. Runs in a pool worker."""
+    pages = _reader(source).pages
+    texts = []
+    for number in page_numbers:
+        started = time.perf_counter()
+        text = pages[number - 1].extract_text() or ""
+        texts.append((text, time.perf_counter() - started))
+    return texts
+
+
+def _image_filter(x_object) -> Optional[str]:
+    filters = x_object.get("/Filter")
+    if isinstance(filters, list):
+        return filters[0] if len(filters) == 1 else None
+    return filters
+
+
+def _save_image(x_object, digest: str, image_dir: Path) -> Optional[Path]:
+    """Write an image XObject under its content hash, reusing a file saved earlier."""
+    extension = RAW_IMAGE_EXTENSIONS.get(_image_filter(x_object))
+    candidates = [extension] if extension else DECODED_IMAGE_EXTENSIONS
+    for candidate in candidates:
+        if (image_dir / f"{digest}{candidate}").exists():
+            return image_dir / f"{digest}{candidate}"
+    if extension:
+        # JPEG and JPEG 2000 streams are complete image files; copy them as they are
+        data = x_object._data
+    else:
+        extension, data = _xobj_to_image(x_object)
+        if extension is None:
+            return None
+    path = image_dir / f"{digest}{extension}"
+    # Write then rename, so a worker saving the same image never sees a partial file
+    partial = path.with_suffix(f"{extension}.{os.getpid()}.part")
+    partial.write_bytes(data)
+    os.replace(partial, path)
+    return path
+
+
+def extract_page_images(source: PdfSource, page_numbers: List[int], image_dir: str) -> List[dict]:
+    """Save the distinct images on the given 1-based pages into ``image_dir``. Runs in a pool worker.
+
+    Images are keyed by the SHA-256 of their encoded stream, so one repeated on
+    every page (a logo, a header) is hashed once per object and saved once.
+    """
+    image_dir = Path(image_dir)
+    images: Dict[str, dict] = {}
+    digests: Dict[int, str] = {}  # Indirect object number -> digest, to skip rehashing shared objects
+    pages = _reader(source).pages
+    for number in page_numbers:
+        resources = pages[number - 1].get("/Resources")
+        x_objects = resources.get_object().get("/XObject") if resources is not None else None
+        if x_objects is None:
+            continue
+        x_objects = x_objects.get_object()
+        for name in x_objects:
+            reference = x_objects.raw_get(name)
+            x_object = x_objects[name]
+            if x_object.get("/Subtype") != "/Image":
+                continue
+            object_id = getattr(reference, "idnum", None)
+            digest = digests.get(object_id) if object_id is not None else None
+            if digest is None:
+                digest = hashlib.sha256(x_object._data).hexdigest()
+                if object_id is not None:
+                    digests[object_id] = digest
+            if digest in images:
+                if number not in images[digest]["pages"]:
+                    images[digest]["pages"].append(number)
+                continue
+            try:
+                path = _save_image(x_object, digest, image_dir)
+            except Exception as e:
+                logger.warning(f"Could not save image {name} on page {number}: {e}")
+                continue
+            if path is not None:
+                images[digest] = {"sha256": digest, "path": str(path), "pages": [number],
+                                  "width": x_object.get("/Width"), "height": x_object.get("/Height")}
+    return list(images.values())
+
+
+def make_thumbnail(image_path: str, size: int) -> str:
+    """Downscale a saved image to fit in ``size`` x ``size`` pixels. Runs in a pool worker."""
+    source = Path(image_path)
+    thumbnail_dir = source.parent / THUMBNAILS_DIR
+    thumbnail_dir.mkdir(exist_ok=True)
+    thumbnail_path = thumbnail_dir / f"{source.stem}-{size}.png"
+    if not thumbnail_path.exists():
+        with Image.open(source) as img:
+            img.draft("RGB", (size, size))  # JPEGs decode straight at a reduced scale
+            img.thumbnail((size, size))
+            partial = thumbnail_path.with_suffix(f".{os.getpid()}.part")
+            img.save(partial, format="PNG")
+            os.replace(partial, thumbnail_path)
+    return str(thumbnail_path)
+
+
+async def collect_images(source: PdfSource, page_numbers: List[int],
+                         thumbnail_size: Optional[int] = None) -> List[dict]:
+    """Extract the distinct images on the given pages in parallel, with optional thumbnails."""
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    chunks = [page_numbers[i:i + PAGES_PER_TASK] for i in range(0, len(page_numbers), PAGES_PER_TASK)]
+    # Created here, once, so the workers never race to make it
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+    results = await asyncio.gather(*[
+        loop.run_in_executor(executor, extract_page_images, source, chunk, IMAGES_DIR) for chunk in chunks
+    ])
+
+    # Chunks dedupe on their own; merge images found by more than one chunk
+    images: Dict[str, dict] = {}
+    for chunk_images in results:
+        for image in chunk_images:
+            if image["sha256"] in images:
+                images[image["sha256"]]["pages"] = sorted(images[image["sha256"]]["pages"] + image["pages"])
+            else:
+                images[image["sha256"]] = image
+    if thumbnail_size:
+        thumbnails = await asyncio.gather(*[
+            loop.run_in_executor(executor, make_thumbnail, image["path"], thumbnail_size) for image in images.values()
+        ], return_exceptions=True)
+        for image, thumbnail in zip(images.values(), thumbnails):
+            if isinstance(thumbnail, Exception):
+                logger.warning(f"Could not make a thumbnail of {image['path']}: {thumbnail}")
+                thumbnail = None
+            image["thumbnail"] = thumbnail
+    return sorted(images.values(), key=lambda image: image["pages"][0])
+
+
+def page_range(total: int, first_page: Optional[int] = None, last_page: Optional[int] = None) -> range:
+    """1-based pages to extract; ``last_page`` is clamped to the document."""
+    first = first_page or 1
+    last = min(last_page or total, total)
+    if first > total:
+        raise ValueError(f"first_page {first} is past the end of the document ({total} pages)")
+    if first > last:
+        raise ValueError(f"first_page {first} is after last_page {last}")
+    return range(first, last + 1)
+
+
+async def iter_page_texts(source: PdfSource, first_page: Optional[int] = None, last_page: Optional[int] = None,
+                          total: Optional[int] = None) -> AsyncIterator[Tuple[int, str]]:
+    """Yield ``(page_number, text)`` in page order while later pages are extracted in parallel.
+
+    Pages are split into chunks of ``PAGES_PER_TASK`` and at most
+    ``TASKS_IN_FLIGHT`` chunks are queued at once, so extraction keeps every
+    worker busy without running far ahead of the consumer. ``total`` is the
+    page count when the caller has already read it. Every chunk sends
+    ``source`` to a worker, so large documents should be passed as a path.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    if total is None:
+        total = await loop.run_in_executor(executor, count_pages, source)
+    pages = page_range(total, first_page, last_page)
+    chunks = iter([list(pages[i:i + PAGES_PER_TASK]) for i in range(0, len(pages), PAGES_PER_TASK)])
+    in_flight = []
+
+    def submit():
+        chunk = next(chunks, None)
+        if chunk is not None:
+            in_flight.append((chunk, loop.run_in_executor(executor, extract_page_texts, source, chunk)))
+
+    for _ in range(TASKS_IN_FLIGHT):
+        submit()
+    try:
+        while in_flight:
+            chunk, future = in_flight.pop(0)
+            texts = await future
+            submit()
+            for number, (text, seconds) in zip(chunk, texts):
+                # Timed in the worker, where metrics would not reach this process's registry
+                STAGE_SECONDS.observe(seconds, stage="pdf_page")
+                yield number, text
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+async def extract_text_and_images(source: PdfSource, first_page: Optional[int] = None,
+                                  last_page: Optional[int] = None, images: bool = False,
+                                  thumbnail_size: Optional[int] = None) -> dict:
+    """Extract the text, and images if asked for, of a PDF or a page range of it without blocking the event loop.
+
+    Returns ``{"pages": [[page_number, text], ...], "images": [...]}``, the form
+    stored in the result cache; ``text_response`` turns it into the API response.
+    """
+    pages = [[number, text] async for number, text in iter_page_texts(source, first_page, last_page)]
+    if not images:
+        return {"pages": pages, "images": []}
+    numbers = [number for number, _ in pages]
+    return {"pages": pages, "images": await collect_images(source, numbers, thumbnail_size)}
+
+
+def text_response(extraction: dict) -> dict:
+    pages = extraction["pages"]
+    return {"text": "\n".join(text for _, text in pages), "pages": len(pages), "images": extraction["images"]}
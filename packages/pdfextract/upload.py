@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+from typing import Optional
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from fastapi import UploadFile
+
+from config.file_utils import create_temp_folder
+from .services import PdfSource
+
+# Upload settings, overridable from the environment
+PDF_MAX_UPLOAD_BYTES = int(os.getenv("PDF_MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+PDF_MEMORY_MAX_BYTES = int(os.getenv("PDF_MEMORY_MAX_BYTES", str(1024 * 1024)))  # Larger uploads spill to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read from the upload at a time
+UPLOAD_DIR = 'temp'
+PDF_MAGIC = b"%PDF-"
+MAGIC_WINDOW = 1024  # Readers accept a header anywhere in the first kilobyte
+
+_upload_dir: Optional[str] = None
+
+
+class UploadTooLargeError(ValueError):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload is larger than the {max_bytes} byte limit.")
+        self.max_bytes = max_bytes
+
+
+class NotAPDFError(ValueError):
+    def __init__(self):
+        super().__init__("Upload is not a PDF file.")
+
+
+def upload_dir() -> str:
+    global _upload_dir
+    if _upload_dir is None:
+        _upload_dir = create_temp_folder(UPLOAD_DIR)
+    return _upload_dir
+
+
+@dataclass
+class ReceivedPDF:
+    digest: str  # SHA-256 of the upload
+    size: int
+    data: Optional[bytes] = None  # Set when the upload was small enough to keep in memory
+    path: Optional[str] = None  # Otherwise, a uniquely named file under UPLOAD_DIR
+
+    @property
+    def source(self) -> PdfSource:
+        return self.data if self.data is not None else self.path
+
+    async def spill(self):
+        """Move an in-memory upload to a unique file under UPLOAD_DIR, for extraction in the pool."""
+        if self.data is None:
+            return
+        fd, path = tempfile.mkstemp(prefix="upload-", suffix=".pdf", dir=upload_dir())
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                await asyncio.to_thread(handle.write, self.data)
+        except BaseException:
+            os.remove(path)
+            raise
+        self.path, self.data = path, None
+
+    def discard(self):
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+async def receive_pdf(file: UploadFile, max_bytes: int = PDF_MAX_UPLOAD_BYTES,
+                      memory_max: int = PDF_MEMORY_MAX_BYTES) -> ReceivedPDF:
+    """Read an upload in one pass: enforce ``max_bytes``, check the PDF header and hash it.
+
+    The bytes stay in memory up to ``memory_max``, so a cached result is
+    served without touching the disk, and spill to a unique temp file past
+    that or when ``ReceivedPDF.spill()`` is called. Raises ``UploadTooLargeError`` or ``NotAPDFError``; no file
+    is left behind when it does.
+    """
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    head = b""
+    size = 0
+    handle = None
+    path = None
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+            if len(head) < MAGIC_WINDOW:
+                head += chunk[:MAGIC_WINDOW - len(head)]
+                if len(head) >= MAGIC_WINDOW and PDF_MAGIC not in head:
+                    raise NotAPDFError()
+            digest.update(chunk)
+            if handle is None and size <= memory_max:
+                buffer += chunk
+                continue
+            if handle is None:
+                fd, path = tempfile.mkstemp(prefix="upload-", suffix=".pdf", dir=upload_dir())
+                handle = os.fdopen(fd, "wb")
+                await asyncio.to_thread(handle.write, buffer)
+                buffer = None
+            await asyncio.to_thread(handle.write, chunk)
+        if PDF_MAGIC not in head:
+            raise NotAPDFError()
+    except BaseException:
+        if handle is not None:
+            handle.close()
+            os.remove(path)
+        raise
+    if handle is not None:
+        handle.close()
+        return ReceivedPDF(digest=digest.hexdigest(), size=size, path=path)
+    return ReceivedPDF(digest=digest.hexdigest(), size=size, data=bytes(buffer))
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tests crawl a local synthetic site: no per-host throttling, and no caches left in the checkout
+CACHE_DIR = tempfile.mkdtemp(prefix="scraper-tests-")
+os.environ.setdefault("HOST_INITIAL_RATE", "1000")
+os.environ.setdefault("HOST_MAX_RATE", "1000")
+os.environ.setdefault("HTTP_CACHE_PATH", os.path.join(CACHE_DIR, "http_cache.sqlite3"))
+os.environ.setdefault("LINK_GRAPH_PATH", os.path.join(CACHE_DIR, "link_graph.sqlite3"))
+
+# The app imports its modules as top-level packages (config.*, engine.*), as when run from app/
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "app"))
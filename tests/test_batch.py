@@ -0,0 +1,34 @@
+import asyncio
+
+import scraper
+from benchmarks.synthetic_site import SyntheticSite
+from config.http_client import close_session
+from engine.fetch import FetchOptions
+
+
+def test_overlapping_sites_share_pages_but_keep_their_results():
+    options = FetchOptions(cache_mode="bypass")
+
+    async def run(site, roots):
+        try:
+            alone = {}
+            for root in roots:
+                result = await scraper.analyze_site(root, options, discover=False)
+                alone[root] = {item["url"] for item in result["urls"]}
+            site.reset_stats()
+            batch = {}
+            async for root, result in scraper.iter_batch_analysis(roots, options, discover=False):
+                batch[root] = {item["url"] for item in result["urls"]}
+            return alone, batch
+        finally:
+            await close_session()
+
+    with SyntheticSite(posts=60) as site:
+        roots = [site.url + "/", site.url + "/tag/tag-1/"]
+        alone, batch = asyncio.run(run(site, roots))
+        served = {path: count for path, count in site.stats.paths.items() if path != "/robots.txt"}
+
+    assert all(alone.values())
+    assert batch == alone
+    assert "/tag/tag-1/" in served
+    assert max(served.values()) == 1  # Pages both sites reach are fetched once
@@ -0,0 +1,22 @@
+from engine.classifier import classify_urls
+
+
+def test_url_lands_in_the_first_matching_bucket_only():
+    # Matches both the tag and the category pattern; the tag rule comes first
+    url = "https://example.com/category/news/tag/python/"
+    classified = classify_urls([url, url])
+    assert classified["tags"] == [{"category": "Python", "link": url}]
+    assert classified["categories"] == []
+    assert classified["pages"] == []
+
+
+def test_buckets_are_sorted_and_page_numbers_capped():
+    classified = classify_urls([
+        "https://example.com/tag/b/",
+        "https://example.com/tag/a/",
+        "https://example.com/page/2/",
+        "https://example.com/page/101/",
+        "https://example.com/about",
+    ])
+    assert [item["link"] for item in classified["tags"]] == ["https://example.com/tag/a/", "https://example.com/tag/b/"]
+    assert classified["pages"] == [{"category": "Pages", "link": "https://example.com/page/2/"}]
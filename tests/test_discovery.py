@@ -0,0 +1,58 @@
+import asyncio
+import gzip
+
+from benchmarks.synthetic_site import SyntheticSite
+from config.http_client import close_session
+from engine import discovery
+from engine.discovery import URLDocumentParser, discover_site_urls
+from engine.fetch import FetchOptions
+
+OPTIONS = FetchOptions(cache_mode="bypass")
+
+
+def discover(site):
+    async def run():
+        try:
+            return await discover_site_urls(site.url, OPTIONS)
+        finally:
+            await close_session()
+
+    return asyncio.run(run())
+
+
+def test_sitemap_index_and_nested_gzipped_sitemap():
+    with SyntheticSite(posts=30, sitemap=True) as site:
+        found = discover(site)
+        expected = site.archive_urls() + site.post_urls()
+        paths = dict(site.stats.paths)
+
+    assert sorted(found.urls) == sorted(expected)
+    assert found.sitemap_urls == len(expected)
+    assert set(found.sources.values()) == {"sitemap"}
+    assert paths["/sitemap-posts.xml.gz"] == 1
+    assert "/feed/" not in paths
+
+
+def test_feed_is_read_when_there_is_no_sitemap():
+    with SyntheticSite(posts=30, feed=True) as site:
+        found = discover(site)
+        expected = site.feed_urls()
+
+    assert found.urls == expected
+    assert not found.has_sitemap
+    assert list(found.sources.values()) == ["feed"]
+
+
+def test_gzipped_document_longer_than_a_parse_chunk_is_read_to_the_end(monkeypatch):
+    # Small chunks leave most of each decompress call's input in unconsumed_tail
+    monkeypatch.setattr(discovery, "PARSE_CHUNK_SIZE", 256)
+    urls = [f"https://example.com/posts/{i}/" for i in range(2000)]
+    body = gzip.compress(("<urlset>" + "".join(f"<url><loc>{url}</loc></url>" for url in urls) + "</urlset>").encode())
+
+    parser = URLDocumentParser()
+    for start in range(0, len(body), 1000):
+        parser.feed(body[start:start + 1000])
+    pages, sitemaps = parser.close()
+
+    assert pages == urls
+    assert sitemaps == []
@@ -0,0 +1,88 @@
+import csv
+import gzip
+import io
+
+import orjson
+import pytest
+
+import export
+from export import CONTENT_COLUMNS, ExportUnavailableError, ExportWriter, negotiate_encoding
+
+RECORDS = [
+    {"url": "https://example.com/", "status": 200, "bytes": 13, "content": "<html></html>", "title": None,
+     "description": None, "truncated": True, "skipped": None, "short_circuited": False, "attempts": 1},
+    {"url": "https://example.com/a.pdf", "status": 200, "bytes": 7, "content": "Skipped", "title": None,
+     "description": None, "truncated": False, "skipped": "not a text document (application/pdf)",
+     "short_circuited": False, "attempts": 2},
+    {"url": "https://down.example/", "status": None, "bytes": 7, "content": "Skipped", "title": None,
+     "description": None, "truncated": False, "skipped": None, "short_circuited": True, "attempts": 1},
+]
+
+
+def unavailable_zstandard():
+    raise ExportUnavailableError("zstd compression needs the zstandard package")
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pandas as pd
+
+    writer = ExportWriter("parquet", CONTENT_COLUMNS, "output")
+    try:
+        for record in RECORDS:
+            writer.write(record)
+        frame = pd.read_parquet(writer.close())
+    finally:
+        writer.discard()
+
+    assert tuple(frame.columns) == CONTENT_COLUMNS
+    assert frame["truncated"].tolist() == [True, False, False]
+    assert frame["short_circuited"].tolist() == [False, False, True]
+    assert frame["attempts"].tolist() == [1, 2, 1]
+    assert frame["skipped"][1] == "not a text document (application/pdf)"
+    assert pd.isna(frame["status"][2])
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_gzip_download_round_trip(fmt):
+    writer = ExportWriter(fmt, CONTENT_COLUMNS, "output", compression="gzip")
+    try:
+        for record in RECORDS:
+            writer.write(record)
+        with open(writer.close(), "rb") as f:
+            text = gzip.decompress(f.read()).decode("utf-8")
+    finally:
+        writer.discard()
+
+    assert writer.filename == f"output.{fmt}.gz"
+    assert writer.media_type == "application/gzip"
+    assert writer.content_encoding is None
+    if fmt == "csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert tuple(rows[0]) == CONTENT_COLUMNS
+        assert [row["url"] for row in rows] == [record["url"] for record in RECORDS]
+        assert rows[1]["skipped"] == "not a text document (application/pdf)"
+    else:
+        assert [orjson.loads(line) for line in text.splitlines()] == RECORDS
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("br, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("GZIP;q=0.8, identity;q=1", "gzip"),
+    ("gzip;q=bad", None),
+])
+def test_negotiate_encoding(monkeypatch, header, expected):
+    monkeypatch.setattr(export, "_zstandard", unavailable_zstandard)
+    assert negotiate_encoding(header) == expected
+
+
+def test_negotiate_encoding_prefers_zstd_at_equal_weight(monkeypatch):
+    monkeypatch.setattr(export, "_zstandard", lambda: None)
+    assert negotiate_encoding("gzip, zstd") == "zstd"
+    assert negotiate_encoding("gzip, zstd;q=0.5") == "gzip"
+    assert negotiate_encoding("gzip, zstd;q=0") == "gzip"
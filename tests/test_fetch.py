@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from benchmarks.synthetic_site import SyntheticSite
+from config.http_client import close_session
+from config.rate_limit import HostScheduler
+from config.resilience import BREAKER_FAILURES, CircuitBreakers, CircuitOpenError
+from engine import fetch
+from engine.fetch import FetchOptions, PageFetchError, fetch_page
+
+
+def test_error_status_does_not_fall_back_to_the_browser(monkeypatch):
+    async def render_page(url, profile):
+        raise AssertionError(f"{url} should not be rendered")
+
+    monkeypatch.setattr(fetch, "render_page", render_page)
+    options = FetchOptions(cache_mode="bypass")
+
+    async def run(site):
+        try:
+            page = await fetch_page(site.url, options)
+            with pytest.raises(PageFetchError) as error:
+                await fetch_page(site.url + "/missing/", options)
+            return page, error.value
+        finally:
+            await close_session()
+
+    with SyntheticSite(posts=20) as site:
+        page, error = asyncio.run(run(site))
+
+    assert page.source == "http"
+    assert error.status == 404
+
+
+def test_render_respects_the_circuit_and_leaves_the_rate_alone(monkeypatch):
+    rendered = []
+
+    async def render_page(url, profile):
+        rendered.append(url)
+        return "<html></html>"
+
+    breakers = CircuitBreakers()
+    scheduler = HostScheduler()
+    monkeypatch.setattr(fetch, "render_page", render_page)
+    monkeypatch.setattr(fetch, "circuit_breakers", breakers)
+    monkeypatch.setattr(fetch, "host_scheduler", scheduler)
+    monkeypatch.setattr(scheduler, "_apply_robots", lambda url: asyncio.sleep(0))
+    url = "https://example.com/"
+    options = FetchOptions(force_render=True)
+
+    bucket = scheduler.bucket(url)
+    bucket.record(429, 0.1)
+    throttled = bucket.rate
+    page = asyncio.run(fetch_page(url, options))
+    assert page.source == "browser"
+    assert bucket.rate == throttled
+
+    for _ in range(BREAKER_FAILURES):
+        breakers.record_failure(url)
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(fetch_page(url, options))
+    assert rendered == [url]
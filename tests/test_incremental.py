@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+import scraper
+from benchmarks.synthetic_site import SyntheticSite
+from config.http_client import close_session
+from engine.fetch import FetchOptions
+from engine.link_graph import LinkGraph
+
+
+@pytest.fixture
+def graph(tmp_path, monkeypatch):
+    graph = LinkGraph(str(tmp_path / "link_graph.sqlite3"))
+    monkeypatch.setattr(scraper, "link_graph", graph)
+    yield graph
+    graph.close()
+
+
+def test_incremental_recrawl_fetches_no_more_than_a_full_crawl(graph):
+    options = FetchOptions(cache_mode="bypass")
+
+    async def crawl(site, incremental):
+        site.reset_stats()
+        result = await scraper.analyze_site(site.url, options, discover=False, incremental=incremental)
+        return site.stats.requests, {item["url"] for item in result["urls"]}
+
+    async def run(site):
+        try:
+            full = await crawl(site, False)
+            runs = [await crawl(site, True) for _ in range(3)]
+        finally:
+            await close_session()
+        return full, runs
+
+    with SyntheticSite(posts=100) as site:
+        (full_requests, full_urls), runs = asyncio.run(run(site))
+
+    assert full_requests > 1
+    for requests, urls in runs:
+        assert requests <= full_requests
+        assert urls == full_urls
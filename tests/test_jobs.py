@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from benchmarks.synthetic_site import SyntheticSite
+from config.http_client import close_session
+from jobs import worker
+from jobs.store import CANCELLED, COMPLETED, JobStore
+from jobs.worker import JobRunner
+
+
+class SlowStore(JobStore):
+    """Job store whose first ``get`` stalls after reading, so the job can change meanwhile."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.slow = True
+
+    def get(self, job_id):
+        job = super().get(job_id)
+        if self.slow:
+            self.slow = False
+            time.sleep(0.2)
+        return job
+
+
+def test_cancel_while_the_worker_reads_the_job(tmp_path, monkeypatch):
+    started = []
+
+    async def handler(store, job):
+        started.append(job["id"])
+
+    monkeypatch.setitem(worker.JOB_HANDLERS, "scrape", handler)
+    store = SlowStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def run():
+        runner = JobRunner(store, workers=1)
+        await runner.start()
+        try:
+            job_id = await runner.submit("scrape", {"urls": []})
+            await asyncio.sleep(0.05)  # The worker is now inside its slow get
+            cancelled = await runner.cancel(job_id)
+            await asyncio.sleep(0.3)
+            return job_id, cancelled
+        finally:
+            await runner.stop()
+
+    job_id, cancelled = asyncio.run(run())
+    assert cancelled
+    assert started == []
+    assert store.get(job_id)["status"] == CANCELLED
+
+
+def test_cancel_does_not_overwrite_a_finished_job(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    runner = JobRunner(store)
+    job_id = store.create("scrape", {"urls": []})
+    store.set_status(job_id, COMPLETED)
+    assert asyncio.run(runner.cancel(job_id)) is False
+    assert store.get(job_id)["status"] == COMPLETED
+    store.close()
+
+
+def test_analyze_job_reports_progress_while_it_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker, "PROGRESS_INTERVAL", 0.01)
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    reports = []
+    update_progress = store.update_progress
+
+    def record(job_id, done, failed=0, total=None):
+        reports.append(done)
+        update_progress(job_id, done, failed, total)
+
+    monkeypatch.setattr(store, "update_progress", record)
+
+    async def run(site):
+        try:
+            job_id = store.create("analyze", {"url": site.url, "discover": False})
+            await worker.run_analyze_job(store, store.get(job_id))
+        finally:
+            await close_session()
+
+    with SyntheticSite(posts=60, latency=0.02) as site:
+        asyncio.run(run(site))
+    store.close()
+
+    assert len(reports) > 1
+    assert reports == sorted(reports)
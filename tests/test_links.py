@@ -0,0 +1,19 @@
+from engine.links import extract_links
+
+
+def test_malformed_hrefs_are_skipped():
+    html = """<html><body>
+        <a href="/posts/1/">Post</a>
+        <a href="http://[::1">Broken</a>
+        <a href="https://other.example/page?x=1">Other</a>
+        <a href="mailto:someone@example.com">Mail</a>
+    </body></html>"""
+    assert extract_links(html, "https://example.com/") == {
+        "https://example.com/posts/1/",
+        "https://other.example/page?x=1",
+    }
+
+
+def test_malformed_base_falls_back_to_the_page_url():
+    html = '<html><head><base href="http://[::1"></head><body><a href="a/">A</a></body></html>'
+    assert extract_links(html, "https://example.com/dir/") == {"https://example.com/dir/a/"}
@@ -0,0 +1,35 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic_pdf import generate_pdf
+from packages.pdfextract import services
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls.append((fn.__name__, args[1:]))
+        return super().submit(fn, *args, **kwargs)
+
+
+def test_in_memory_document_is_extracted_in_chunks(monkeypatch):
+    executor = RecordingExecutor()
+    monkeypatch.setattr(services, "get_executor", lambda: executor)
+    data = generate_pdf(3 * services.PAGES_PER_TASK + 1, lines_per_page=2)
+
+    async def extract():
+        return [number async for number, _ in services.iter_page_texts(data)]
+
+    try:
+        numbers = asyncio.run(extract())
+    finally:
+        executor.shutdown()
+
+    assert numbers == list(range(1, 3 * services.PAGES_PER_TASK + 2))
+    chunks = [args[0] for name, args in executor.calls if name == "extract_page_texts"]
+    assert len(chunks) == 4
+    assert max(len(chunk) for chunk in chunks) == services.PAGES_PER_TASK
+    assert [name for name, _ in executor.calls].count("count_pages") == 1
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from config.rate_limit import HostScheduler
+from config.resilience import CircuitBreaker, CircuitBreakers, CircuitOpenError
+
+
+def open_breaker(breakers: CircuitBreakers, url: str, failures: int = 2, reset_timeout: float = 0.05):
+    breakers._breakers["example.com"] = CircuitBreaker(failures=failures, reset_timeout=reset_timeout)
+    for _ in range(failures):
+        breakers.record_failure(url)
+
+
+def test_open_half_open_closed():
+    breakers = CircuitBreakers()
+    url = "https://example.com/page/"
+    open_breaker(breakers, url)
+    with pytest.raises(CircuitOpenError):
+        breakers.check(url)
+
+    time.sleep(0.06)
+    # The quick check before waiting for a rate-limit token must not use up the probe
+    assert breakers.check(url, probe=False) is False
+    assert breakers.check(url) is True
+    with pytest.raises(CircuitOpenError):
+        breakers.check(url)  # Only one probe at a time
+    breakers.record_success(url)
+    assert breakers.check(url) is False
+
+
+def test_failed_probe_reopens():
+    breakers = CircuitBreakers()
+    url = "https://example.com/"
+    open_breaker(breakers, url)
+    time.sleep(0.06)
+    assert breakers.check(url) is True
+    breakers.record_failure(url)
+    with pytest.raises(CircuitOpenError):
+        breakers.check(url, probe=False)
+    time.sleep(0.06)
+    assert breakers.check(url) is True
+
+
+def test_released_probe_lets_the_next_request_probe():
+    breakers = CircuitBreakers()
+    url = "https://example.com/"
+    open_breaker(breakers, url)
+    time.sleep(0.06)
+    assert breakers.check(url) is True
+    breakers.release_probe(url)
+    assert breakers.check(url) is True
+
+
+def test_cancelled_cached_get_releases_the_probe(monkeypatch):
+    from config import http_cache
+
+    breakers = CircuitBreakers()
+    url = "https://example.com/"
+    open_breaker(breakers, url)
+    time.sleep(0.06)
+    monkeypatch.setattr(http_cache, "circuit_breakers", breakers)
+    # A private scheduler that never fetches robots.txt keeps the test off the network
+    scheduler = HostScheduler()
+    monkeypatch.setattr(scheduler, "_apply_robots", lambda url: asyncio.sleep(0))
+    monkeypatch.setattr(http_cache, "host_scheduler", scheduler)
+
+    class HangingLimiter:
+        def slot(self, url):
+            class Slot:
+                async def __aenter__(self):
+                    await asyncio.sleep(10)
+
+                async def __aexit__(self, *exc_info):
+                    return False
+            return Slot()
+
+    monkeypatch.setattr(http_cache, "request_limiter", HangingLimiter())
+
+    async def run():
+        task = asyncio.create_task(http_cache.cached_get(url, http_cache.CACHE_BYPASS))
+        for _ in range(100):
+            if breakers._breakers["example.com"].probing:
+                break
+            await asyncio.sleep(0.01)
+        assert breakers._breakers["example.com"].probing
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert not breakers._breakers["example.com"].probing